@@ -0,0 +1,126 @@
+import time
+
+from events import Expanded
+from utils import IndexedPriorityQueue, SearchState, zeroed_array
+from world import cell_distance
+
+# Anytime search (ARA*)
+#
+# Weighted A* orders the frontier by g + w*h. With w > 1 it heads for the destination almost as directly as GBFS,
+# and the path it finds costs at most w times the optimum. ARA* starts with a large w and lowers it step by step.
+# Each round reuses the g values of the previous ones: only cells whose cost improved after they were expanded
+# (the inconsistent cells) are searched again, so later rounds are much cheaper than running A* again at the new
+# weight. Every round that improves the answer is reported with its suboptimality bound, the factor by which the
+# path can at most exceed the optimum. It drops to 1 once the path is proven optimal.
+
+WEIGHTS = [3.0, 2.0, 1.5, 1.25, 1.1, 1.0]
+# expansions between deadline checks
+CHECK_EVERY = 256
+
+class Solution:
+    "One improved answer of an anytime search"
+    def __init__(self, path, path_cost, bound, weight, nodes_expanded, seconds):
+        self.path = path
+        self.path_cost = path_cost
+        # the path costs at most bound times the optimum
+        self.bound = bound
+        self.weight = weight
+        # expanded by all rounds so far
+        self.nodes_expanded = nodes_expanded
+        self.seconds = seconds
+
+    def __str__(self):
+        return f"cost {self.path_cost} within {self.bound:.3f}x of optimal (w={self.weight}, {self.nodes_expanded} expanded)"
+
+# yields a Solution each time the path or its bound improves
+# with expansions=True it also yields an Expanded (see events.py) for every node it pops, for the stream in streaming.py
+# 'deadline' is a time.perf_counter() value; once the first path is found, no round runs past it
+# the generator's return value is the total number of nodes expanded, for callers that need it on failure
+def ara_star(world, source, dest, deadline=None, weights=WEIGHTS, expansions=False):
+    started = time.perf_counter()
+    state = SearchState(world.size)
+    state.visit(source)
+    # the round a cell was last expanded in, so starting a round doesn't need to clear anything
+    closed_in = zeroed_array('I', world.size)
+    frontier = IndexedPriorityQueue()
+    inconsistent = set()
+    nodes_expanded = 0
+    best = None
+
+    def h(cell):
+        return cell_distance(world, cell, dest)
+
+    frontier.push(source, weights[0] * h(source))
+    for round_number, weight in enumerate(weights, 1):
+        if round_number > 1:
+            # the cells that got cheaper after their expansion are searched again, everything is re-keyed for 'weight'
+            cells = list(frontier.entries) + list(inconsistent)
+            inconsistent = set()
+            frontier = IndexedPriorityQueue()
+            for cell in cells:
+                frontier.update(cell, state.g[cell] + weight * h(cell))
+
+        # improve the path while something on the frontier could still beat it at this weight
+        expired = False
+        while frontier and (not state.visited[dest] or frontier.peek()[0] < state.g[dest]):
+            if best is not None and deadline is not None and nodes_expanded % CHECK_EVERY == 0 \
+                    and time.perf_counter() >= deadline:
+                expired = True
+                break
+            size = len(frontier)
+            node = frontier.pop()
+            closed_in[node] = round_number
+            nodes_expanded += 1
+            gn = state.g[node]
+            for child in world.neighbors(node):
+                g_child = gn + world.step_cost(child)
+                if state.visited[child] and g_child >= state.g[child]:
+                    continue
+                state.visit(child, node, g_child)
+                if closed_in[child] == round_number:
+                    inconsistent.add(child)
+                else:
+                    frontier.update(child, g_child + weight * h(child))
+            if expansions:
+                yield Expanded(node, gn, len(frontier) - size, len(frontier))
+
+        if expired or not state.visited[dest]:
+            break
+
+        # cells improved since their expansion can leave the parent chain cheaper than g of the destination
+        path = state.path(dest)
+        path_cost = sum(world.step_cost(cell) for cell in path[1:])
+        # the optimum is at least the smallest g + h still waiting to be searched
+        waiting = [state.g[cell] + h(cell) for cell in list(frontier.entries) + list(inconsistent)]
+        bound = weight
+        if not waiting:
+            bound = 1.0
+        elif min(waiting) > 0:
+            bound = max(1.0, min(weight, path_cost / min(waiting)))
+        if best is None or path_cost < best.path_cost or bound < best.bound:
+            best = Solution(path, path_cost, bound, weight, nodes_expanded, time.perf_counter() - started)
+            yield best
+        if bound == 1.0 or (deadline is not None and time.perf_counter() >= deadline):
+            break
+
+    return nodes_expanded
+
+# same signature and result as the searches in search.py: the best path found within 'budget' seconds
+# each improvement is passed to 'on_improve' as it is found, with no budget it runs until the path is optimal
+def anytime_search(world, source, dest, budget=None, on_improve=None):
+    if source == dest:
+        return [source], 0, 0
+    deadline = None if budget is None else time.perf_counter() + budget
+    solutions = ara_star(world, source, dest, deadline)
+    best = None
+    while True:
+        try:
+            best = next(solutions)
+        except StopIteration as stop:
+            nodes_expanded = stop.value
+            break
+        if on_improve is not None:
+            on_improve(best)
+    if best is None:
+        return [], 0, nodes_expanded
+    return best.path, best.path_cost, nodes_expanded
@@ -0,0 +1,77 @@
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from search import ALGORITHMS, check_budget, load_world, route_cells
+from world import World
+
+# each worker attaches to the compiled world once, instead of having polygons pickled with every query
+_shm = None
+_world = None
+
+# copies the bit-packed masks of a world into one shared memory block
+def share_world(world):
+    nbytes = len(world.blocked_bits)
+    shm = shared_memory.SharedMemory(create=True, size=2 * nbytes)
+    bits = np.ndarray((2, nbytes), dtype=np.uint8, buffer=shm.buf)
+    bits[0] = world.blocked_bits
+    bits[1] = world.turf_bits
+    return shm
+
+# builds a World over a block made by share_world, no copy is made
+def attach_world(shm, width, height):
+    nbytes = (width * height + 7) // 8
+    bits = np.ndarray((2, nbytes), dtype=np.uint8, buffer=shm.buf)
+    return World(width, height, bits[0], bits[1])
+
+# 'files' are the world's (enclosure path, turf path), so preprocessing like HPA* and landmarks is cached next to them
+def init_worker(name, width, height, files=None, digest=None):
+    global _shm, _world
+    _shm = shared_memory.SharedMemory(name=name)
+    _world = attach_world(_shm, width, height)
+    _world.files = files
+    _world.digest = digest
+
+# answers one (algorithm, source, dest, budget) query against a world, source and dest are (x, y) tuples
+def solve(world, algorithm, source, dest, budget=None):
+    path, path_cost, nodes_expanded = route_cells(world, algorithm, world.cell_id(*source), world.cell_id(*dest), budget)
+    return {
+        "source": source,
+        "dest": dest,
+        "path": [world.cell_xy(cell) for cell in path],
+        "path_cost": path_cost,
+        "nodes_expanded": nodes_expanded,
+    }
+
+def solve_in_worker(query):
+    return solve(_world, *query)
+
+# routes every (source, dest) pair in 'pairs' with 'algorithm', any name in search.ALGORITHMS
+# 'budget' gives ARA* that many seconds per pair, it returns the best path found by then
+# for a compiled world, 'enc_path' is the .npz and 'turf_path' is None
+# the world is compiled once and shared with a pool of 'processes' workers (all cores by default)
+# returns one result dict per pair, in order, with the path, path cost and nodes expanded
+# an unreachable pair gets an empty path
+def run_batch(enc_path, turf_path, pairs, algorithm="A*", processes=None, chunksize=16, budget=None):
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {', '.join(ALGORITHMS)}")
+    check_budget(algorithm, budget)
+    world = load_world(enc_path, turf_path)
+    queries = [(algorithm, tuple(source), tuple(dest), budget) for source, dest in pairs]
+    # cell ids don't check bounds, an x past the edge would wrap into the next row
+    for _, source, dest, _ in queries:
+        for x, y in (source, dest):
+            if not (0 <= x < world.width and 0 <= y < world.height):
+                raise ValueError(f"pair ({source}, {dest}): ({x}, {y}) is outside the {world.width}x{world.height} world")
+
+    if processes == 1:
+        return [solve(world, *query) for query in queries]
+
+    shm = share_world(world)
+    try:
+        initargs = (shm.name, world.width, world.height, world.files, world.digest)
+        with Pool(processes, initializer=init_worker, initargs=initargs) as pool:
+            return pool.map(solve_in_worker, queries, chunksize)
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,124 @@
+# randomized differential checks of the searches against plain A* and BFS on small random worlds
+# run from the repository root: python -m benchmarks.check_optimality [--worlds N] [--sequences N] [--seed S]
+# every optimal search must match the optimal cost, every path must be a walk of free cells between the endpoints
+# that costs what the search reports, and D* Lite must match a cold A* after every edit of a random edit sequence
+# exits with status 1 and prints the failing case on the first mismatch
+import argparse
+import random
+import sys
+
+from benchmarks.suite import random_boxes
+from replan import IncrementalPlanner
+from search import ALGORITHMS, a_star, bfs
+from world import compile_world
+
+# searches whose cost must equal A*'s, and the ones whose number of steps must equal BFS's
+TURF_OPTIMAL = ["JPS", "ARA*", "ALT", "FIELD"]
+STEP_OPTIMAL = ["BiBFS", "WAVE"]
+# searches that only have to return valid paths, never cheaper than the optimum
+VALID_ONLY = ["DFS", "GBFS", "ALT-GBFS", "HPA*"]
+SIZES = [8, 15, 30, 50]
+QUERIES = 8
+
+def fail(message, **case):
+    print(f"FAILED: {message}")
+    for name, value in case.items():
+        print(f"  {name}: {value}")
+    sys.exit(1)
+
+def random_world(rng):
+    n = rng.choice(SIZES)
+    enclosures = random_boxes(rng, n, rng.choice([0.0, 0.1, 0.25, 0.4]))
+    turfs = random_boxes(rng, n, rng.choice([0.0, 0.1, 0.3]))
+    return compile_world(enclosures, turfs, n, n)
+
+# a path has to start at the source, end at the destination, step between free neighbors and cost what was reported
+def check_path(world, name, source, dest, path, path_cost, unit_cost, case):
+    if path[0] != source or path[-1] != dest:
+        fail(f"{name} path doesn't join the endpoints", **case)
+    for cell, child in zip(path, path[1:]):
+        if child not in world.neighbors(cell):
+            fail(f"{name} path steps from {world.cell_xy(cell)} to {world.cell_xy(child)}", **case)
+    cost = len(path) - 1 if unit_cost else sum(world.step_cost(cell) for cell in path[1:])
+    if abs(cost - path_cost) > 1e-9:
+        fail(f"{name} reports cost {path_cost} for a path that costs {cost}", **case)
+
+def check_searches(rng, worlds):
+    for number in range(worlds):
+        world = random_world(rng)
+        for _ in range(QUERIES):
+            source, dest = rng.randrange(world.size), rng.randrange(world.size)
+            case = {"world": number, "size": world.width, "source": world.cell_xy(source), "dest": world.cell_xy(dest)}
+            best_path, best_cost, _ = a_star(world, source, dest)
+            steps_path, steps, _ = bfs(world, source, dest)
+            for name in TURF_OPTIMAL + STEP_OPTIMAL + VALID_ONLY:
+                path, path_cost, _ = ALGORITHMS[name](world, source, dest)
+                if bool(path) != bool(best_path):
+                    fail(f"{name} {'found' if path else 'missed'} a path A* {'missed' if path else 'found'}", **case)
+                if not path:
+                    continue
+                unit_cost = name in STEP_OPTIMAL or name == "DFS"
+                check_path(world, name, source, dest, path, path_cost, unit_cost, case)
+                if name in TURF_OPTIMAL and abs(path_cost - best_cost) > 1e-9:
+                    fail(f"{name} cost {path_cost}, A* {best_cost}", **case)
+                if name in STEP_OPTIMAL and path_cost != steps:
+                    fail(f"{name} took {path_cost} steps, BFS {steps}", **case)
+                if name in VALID_ONLY and not unit_cost and path_cost < best_cost - 1e-9:
+                    fail(f"{name} cost {path_cost} is below the optimum {best_cost}", **case)
+    print(f"searches: {worlds} worlds x {QUERIES} queries agree with A* and BFS")
+
+def random_box(rng, n):
+    x, y = rng.randrange(n), rng.randrange(n)
+    w, h = rng.randint(1, max(n // 5, 1)), rng.randint(1, max(n // 5, 1))
+    return [(x, y), (min(x + w, n - 1), y), (min(x + w, n - 1), min(y + h, n - 1)), (x, min(y + h, n - 1))]
+
+def check_replanning(rng, sequences, edits=12):
+    for number in range(sequences):
+        world = random_world(rng)
+        n = world.width
+        source, dest = rng.randrange(world.size), rng.randrange(world.size)
+        planner = IncrementalPlanner(world, source, dest)
+        history = []
+        for step in range(edits):
+            enclosures, turfs = world.polygons
+            move = rng.choice(["add enclosure", "add turf", "remove enclosure", "remove turf", "move source", "plan"])
+            if move == "add enclosure":
+                box = random_box(rng, n)
+                result = planner.add_enclosure(box)
+            elif move == "add turf":
+                box = random_box(rng, n)
+                result = planner.add_turf(box)
+            elif move == "remove enclosure" and enclosures:
+                box = rng.choice(enclosures)
+                result = planner.remove_enclosure(box)
+            elif move == "remove turf" and turfs:
+                box = rng.choice(turfs)
+                result = planner.remove_turf(box)
+            elif move == "move source":
+                box = rng.randrange(world.size)
+                result = planner.move_source(box)
+            else:
+                move, box = "plan", None
+                result = planner.plan()
+            history.append((move, box))
+            path, path_cost, _ = result
+            best_path, best_cost, _ = a_star(world, planner.source, dest)
+            case = {"sequence": number, "size": n, "dest": world.cell_xy(dest), "edits": history}
+            if bool(path) != bool(best_path) or abs(path_cost - best_cost) > 1e-9:
+                fail(f"D* Lite cost {path_cost if path else None}, cold A* {best_cost if best_path else None}", **case)
+            if path:
+                check_path(world, "D* Lite", planner.source, dest, path, path_cost, False, case)
+    print(f"replanning: {sequences} edit sequences x {edits} edits agree with a cold A*")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the searches against A* and BFS on random worlds.")
+    parser.add_argument("--worlds", type=int, default=100)
+    parser.add_argument("--sequences", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+    check_searches(rng, args.worlds)
+    check_replanning(rng, args.sequences)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# compares the O(1) FIFO and the indexed priority queue against the original containers
+# run from the repository root: python -m benchmarks.containers [ops ...]
+import random
+import sys
+import time
+
+from utils import Queue, FifoQueue, PriorityQueue, IndexedPriorityQueue
+
+OPS = [10**4, 10**5, 10**6]
+
+# the original classes are quadratic, past these sizes a single run takes minutes
+LEGACY_LIMITS = {Queue: 10**5, PriorityQueue: 10**4}
+
+# push n items then pop them all
+def fifo_workload(cls, n):
+    queue = cls()
+    for i in range(n):
+        queue.push(i)
+    while not queue.isEmpty():
+        queue.pop()
+
+# the A* pattern: n new items, n decrease-keys on items still queued, then drain
+def priority_workload(cls, n, seed=0):
+    rng = random.Random(seed)
+    queue = cls()
+    priorities = [rng.random() * n for _ in range(n)]
+    for item, priority in enumerate(priorities):
+        queue.update(item, priority)
+    for _ in range(n):
+        item = rng.randrange(n)
+        priorities[item] *= 0.5
+        queue.update(item, priorities[item])
+    while not queue.isEmpty():
+        queue.pop()
+
+def timed(workload, cls, n):
+    if n > LEGACY_LIMITS.get(cls, n):
+        return None
+    start = time.perf_counter()
+    workload(cls, n)
+    return time.perf_counter() - start
+
+def main(ops):
+    print(f"{'ops':>9} {'container':>22} {'seconds':>9}")
+    for n in ops:
+        for workload, classes in [(fifo_workload, [Queue, FifoQueue]),
+                                  (priority_workload, [PriorityQueue, IndexedPriorityQueue])]:
+            for cls in classes:
+                elapsed = timed(workload, cls, n)
+                shown = "skipped" if elapsed is None else f"{elapsed:.3f}"
+                print(f"{n:>9} {cls.__name__:>22} {shown:>9}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or OPS)
@@ -0,0 +1,59 @@
+# exact off-grid enclosure checks: the original loop over every polygon against the STRtree index
+# run from the repository root: python -m benchmarks.containment [polygons ...]
+# all times are for POINTS random points, the legacy time is measured on a sample and scaled up
+import random
+import sys
+import time
+
+import numpy as np
+from shapely import geometry
+
+from benchmarks.suite import random_boxes
+from world import PolygonIndex
+
+POLYGONS = [10, 100, 1000]
+POINTS = 2000
+
+# is_enclosed as it was, rebuilding and buffering every polygon for every point
+def legacy_is_enclosed(x, y, polygon_list):
+    point = geometry.Point(x, y)
+    for polygon in polygon_list:
+        enclosure = geometry.Polygon(polygon)
+        buffered_enclosure = enclosure.buffer(0.25)
+        if buffered_enclosure.contains(point) or enclosure.touches(point):
+            return True
+    return False
+
+def main(counts, seed=0):
+    print(f"{'polygons':>8} {'legacy s':>9} {'build s':>8} {'single s':>9} {'bulk s':>8}")
+    for count in counts:
+        rng = random.Random(seed)
+        n = int((count * 40) ** 0.5) + 10
+        polygons = []
+        while len(polygons) < count:
+            polygons += random_boxes(rng, n, 0.3)
+        polygons = polygons[:count]
+        xs = np.array([rng.uniform(0, n) for _ in range(POINTS)])
+        ys = np.array([rng.uniform(0, n) for _ in range(POINTS)])
+
+        # the legacy loop is too slow past a few hundred points on large polygon lists
+        sample = max(POINTS * 10 // count, 20)
+        start = time.perf_counter()
+        legacy = [legacy_is_enclosed(x, y, polygons) for x, y in zip(xs[:sample], ys[:sample])]
+        legacy_seconds = (time.perf_counter() - start) * POINTS / sample
+
+        start = time.perf_counter()
+        index = PolygonIndex(polygons)
+        build_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        single = [index.contains(x, y) for x, y in zip(xs, ys)]
+        single_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        bulk = index.contains_many(xs, ys)
+        bulk_seconds = time.perf_counter() - start
+
+        assert legacy == single[:sample] and single == bulk.tolist()
+        print(f"{count:>8} {legacy_seconds:>9.3f} {build_seconds:>8.3f} {single_seconds:>9.3f} {bulk_seconds:>8.4f}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or POLYGONS)
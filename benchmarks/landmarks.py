@@ -0,0 +1,41 @@
+# A* and GBFS with the straight line against the landmark (ALT) bound, on random worlds
+# run from the repository root: python -m benchmarks.landmarks [sizes ...]
+# queries run corner to corner, the landmark build time is paid once per world and reported separately
+import random
+import sys
+import time
+
+from benchmarks.suite import random_boxes, nearest_free
+from landmarks import landmarks_for
+from search import a_star, alt_a_star, alt_gbfs, gbfs
+from world import compile_world
+
+SIZES = [100, 200, 400]
+DENSITY = 0.3
+QUERIES = 5
+
+def main(sizes, seed=0):
+    print(f"{'size':>5} {'build s':>8} {'search':>9} {'expanded':>9} {'cost':>8} {'seconds':>8}")
+    for n in sizes:
+        rng = random.Random(seed)
+        world = compile_world(random_boxes(rng, n, DENSITY), random_boxes(rng, n, DENSITY / 2), n, n)
+        start = time.perf_counter()
+        landmarks_for(world)
+        build_seconds = time.perf_counter() - start
+
+        queries = []
+        for _ in range(QUERIES):
+            x, y = rng.randrange(n // 5), rng.randrange(n // 5)
+            queries.append((world.cell_id(*nearest_free(world, x, y)), world.cell_id(*nearest_free(world, n - 1 - x, n - 1 - y))))
+        for name, engine in [("A*", a_star), ("ALT", alt_a_star), ("GBFS", gbfs), ("ALT-GBFS", alt_gbfs)]:
+            expanded = cost = 0
+            start = time.perf_counter()
+            for source, dest in queries:
+                path, path_cost, nodes_expanded = engine(world, source, dest)
+                expanded += nodes_expanded
+                cost += path_cost
+            seconds = time.perf_counter() - start
+            print(f"{n:>5} {build_seconds:>8.2f} {name:>9} {expanded // QUERIES:>9} {cost / QUERIES:>8.1f} {seconds / QUERIES:>8.4f}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,89 @@
+# peak memory of one BFS with the old node model against the current one, on open worlds of increasing size
+# old: a Point with a __dict__, its own directions list and children list is allocated for every generated
+#      neighbor, and parents, heuristics and turf flags are kept on the Points
+# new: the search runs on cell ids with flat per-search arrays, only the path becomes (interned, __slots__) Points
+# every run is in a fresh process and reports how far it raised the peak RSS over the loaded world
+# run from the repository root: python -m benchmarks.node_memory [size ...]
+import math
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.search_scaling import make_world
+from grid import Point
+from search import bfs
+from utils import FifoQueue
+
+SIZES = [250, 500, 1000]
+
+class LegacyPoint:
+    "The node model the searches used to allocate per neighbor"
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.children = []
+        self.directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+        self.parent = None
+        self.heuristic = 0
+        self.inside = False
+
+    def set_children(self, children):
+        for child in children:
+            child.parent = self
+            self.children.append(child)
+
+# the old expansion pattern on top of the compiled world, with an O(1) explored set so only the nodes differ
+def legacy_bfs(world, source, dest):
+    node = LegacyPoint(*world.cell_xy(source))
+    dest_x, dest_y = world.cell_xy(dest)
+    explored = {(node.x, node.y)}
+    frontier = FifoQueue()
+    frontier.push(node)
+    while not frontier.isEmpty():
+        node = frontier.pop()
+        children = []
+        for dx, dy in node.directions:
+            child = LegacyPoint(node.x + dx, node.y + dy)
+            if world.is_blocked(child.x, child.y) or (child.x, child.y) in explored:
+                continue
+            child.inside = world.is_turf(child.x, child.y)
+            child.heuristic = math.sqrt((dest_x - child.x)**2 + (dest_y - child.y)**2)
+            explored.add((child.x, child.y))
+            children.append(child)
+        node.set_children(children)
+        for child in children:
+            if (child.x, child.y) == (dest_x, dest_y):
+                path = []
+                while child is not None:
+                    path.append(child)
+                    child = child.parent
+                return path[::-1]
+            frontier.push(child)
+    return []
+
+def current_bfs(world, source, dest):
+    path = bfs(world, source, dest)[0]
+    return [Point(*world.cell_xy(cell)) for cell in path]
+
+def peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def measure(model, n):
+    world = make_world(n)
+    search = legacy_bfs if model == "old" else current_bfs
+    before = peak_mb()
+    start = time.perf_counter()
+    path = search(world, world.cell_id(0, 0), world.cell_id(n - 1, 0))
+    return len(path), peak_mb() - before, time.perf_counter() - start
+
+def main(sizes):
+    print(f"{'size':>6} {'model':>5} {'path':>6} {'peak +MB':>9} {'seconds':>8}")
+    for n in sizes:
+        for model in ["old", "new"]:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                length, mb, seconds = pool.submit(measure, model, n).result()
+            print(f"{n:>6} {model:>5} {length:>6} {mb:>9.1f} {seconds:>8.2f}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,42 @@
+# replans after enclosures drop onto the current path and compares against a cold A* on the edited world
+# run from the repository root: python -m benchmarks.replanning [size ...]
+import random
+import sys
+import time
+
+from benchmarks.suite import random_boxes, nearest_free
+from replan import IncrementalPlanner
+from search import a_star
+from world import compile_world
+
+SIZES = [100, 200, 400]
+EDITS = 20
+
+def main(sizes, seed=0):
+    print(f"{'size':>6} {'edit':>4} {'cost':>8} {'replan exp':>10} {'replan s':>9} {'A* exp':>8} {'A* s':>7}")
+    for n in sizes:
+        rng = random.Random(f"{seed}-{n}")
+        world = compile_world(random_boxes(rng, n, 0.15), random_boxes(rng, n, 0.1), n, n)
+        source, dest = world.cell_id(*nearest_free(world, 0, 0)), world.cell_id(*nearest_free(world, n - 1, n - 1))
+        planner = IncrementalPlanner(world, source, dest)
+        path, path_cost, nodes_expanded = planner.plan()
+        totals = [0, 0.0, 0, 0.0]
+        for edit in range(EDITS):
+            if not path:
+                break
+            # a small box on a random cell of the path, never on the endpoints
+            x, y = world.cell_xy(rng.choice(path[len(path) // 10: -len(path) // 10]))
+            box = [(x, y), (x + 2, y), (x + 2, y + 2), (x, y + 2)]
+            start = time.perf_counter()
+            path, path_cost, replan_expanded = planner.add_enclosure(box)
+            replan_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            cold_cost, cold_expanded = a_star(world, source, dest)[1:]
+            cold_seconds = time.perf_counter() - start
+            assert path_cost == cold_cost
+            totals = [totals[0] + replan_expanded, totals[1] + replan_seconds, totals[2] + cold_expanded, totals[3] + cold_seconds]
+            print(f"{n:>6} {edit:>4} {path_cost:>8} {replan_expanded:>10} {replan_seconds:>9.4f} {cold_expanded:>8} {cold_seconds:>7.4f}")
+        print(f"{n:>6} {'all':>4} {'':>8} {totals[0]:>10} {totals[1]:>9.3f} {totals[2]:>8} {totals[3]:>7.3f}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,36 @@
+# times every search on open square worlds of increasing size
+# with O(1) visited checks the time per expanded node should stay flat as the grid grows
+# run from the repository root: python -m benchmarks.search_scaling
+import sys
+import time
+
+import numpy as np
+
+from search import bfs, dfs, gbfs, a_star
+from world import world_from_arrays, OPEN_COST, TURF_COST
+
+SIZES = [50, 100, 200, 400, 800]
+
+# an open world with a wall down the middle (gap at the top) and a turf strip, so the searches have to detour
+def make_world(n):
+    blocked = np.zeros((n, n), dtype=bool)
+    blocked[: n - 2, n // 2] = True
+    cost = np.full((n, n), OPEN_COST)
+    cost[:, n // 4] = TURF_COST
+    return world_from_arrays(blocked, cost)
+
+def main(sizes):
+    print(f"{'size':>6} {'search':>6} {'expanded':>10} {'seconds':>9} {'us/node':>8}")
+    for n in sizes:
+        world = make_world(n)
+        source = world.cell_id(0, 0)
+        dest = world.cell_id(n - 1, 0)
+        for key, engine in [("BFS", bfs), ("DFS", dfs), ("GBFS", gbfs), ("A*", a_star)]:
+            start = time.perf_counter()
+            path, path_cost, nodes_expanded = engine(world, source, dest)
+            elapsed = time.perf_counter() - start
+            per_node = elapsed / max(nodes_expanded, 1) * 1e6
+            print(f"{n:>6} {key:>6} {nodes_expanded:>10} {elapsed:>9.3f} {per_node:>8.2f}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,128 @@
+# runs the searches on random worlds of increasing size and obstacle density and records how each one does
+# every run happens in a fresh process so its peak memory isn't hidden by an earlier, larger run
+# run from the repository root: python -m benchmarks.suite [--sizes 50 100 ...] [--densities 0.1 0.3 ...]
+# results go to <out>/results.json and <out>/results.csv, the generated world files are kept next to them
+import argparse
+import csv
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, peak memory is left out there
+    resource = None
+
+from search import ALGORITHMS
+from world import compile_world, save_world, load_compiled_world
+
+SIZES = [50, 100, 200, 400]
+DENSITIES = [0.1, 0.2, 0.3]
+TURF_DENSITY = 0.1
+ALGORITHMS_RUN = ["BFS", "DFS", "GBFS", "A*", "JPS"]
+FIELDS = ["size", "density", "blocked_fraction", "algorithm", "found", "path_cost", "nodes_expanded",
+          "seconds", "peak_rss_mb", "search_rss_mb"]
+
+# random axis-aligned boxes until their total area reaches 'density' of the world, overlaps make the real cover a bit lower
+def random_boxes(rng, n, density):
+    boxes = []
+    area = 0
+    largest = max(2, n // 8)
+    while area < density * n * n:
+        w, h = rng.randint(1, largest), rng.randint(1, largest)
+        x, y = rng.randint(0, n - 1 - w), rng.randint(0, n - 1 - h)
+        boxes.append([(x, y), (x + w, y), (x + w, y + h), (x, y + h)])
+        area += w * h
+    return boxes
+
+def write_polygons(path, n, polygons):
+    with open(path, "w") as f:
+        f.write(f"# size {n},{n}\n")
+        for polygon in polygons:
+            f.write(";".join(f"{x},{y}" for x, y in polygon) + "\n")
+
+# the free cell closest to (x, y), searched outward in squares
+def nearest_free(world, x, y):
+    for radius in range(max(world.width, world.height)):
+        for dx in range(-radius, radius + 1):
+            for dy in range(-radius, radius + 1):
+                if not world.is_blocked(x + dx, y + dy):
+                    return x + dx, y + dy
+    return None
+
+# writes the polygon files and the compiled world, returns (compiled path, blocked fraction, source, dest)
+def make_world(out, n, density, seed):
+    rng = random.Random(f"{seed}-{n}-{density}")
+    enclosures = random_boxes(rng, n, density)
+    turfs = random_boxes(rng, n, TURF_DENSITY)
+    name = os.path.join(out, f"world-{n}-{density}")
+    write_polygons(name + "_enclosures.txt", n, enclosures)
+    write_polygons(name + "_turfs.txt", n, turfs)
+    world = compile_world(enclosures, turfs, n, n)
+    save_world(world, name + ".npz")
+    blocked_fraction = float(world.blocked_mask().mean())
+    return name + ".npz", blocked_fraction, nearest_free(world, 0, 0), nearest_free(world, n - 1, n - 1)
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# runs in the child process
+def measure(compiled_path, algorithm, source, dest):
+    world = load_compiled_world(compiled_path)
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    path, path_cost, nodes_expanded = ALGORITHMS[algorithm](world, world.cell_id(*source), world.cell_id(*dest))
+    elapsed = time.perf_counter() - start
+    after = peak_rss_mb()
+    return {
+        "found": bool(path),
+        "path_cost": path_cost if path else None,
+        "nodes_expanded": nodes_expanded,
+        "seconds": elapsed,
+        "peak_rss_mb": after,
+        # how far the search pushed the peak past the loaded world
+        "search_rss_mb": None if after is None else after - before,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the searches on random worlds.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--densities", type=float, nargs="+", default=DENSITIES)
+    parser.add_argument("--algorithms", nargs="+", choices=list(ALGORITHMS), default=ALGORITHMS_RUN)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="benchmark-results")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    rows = []
+    print(f"{'size':>6} {'density':>7} {'search':>6} {'cost':>8} {'expanded':>10} {'seconds':>9} {'peak MB':>8}")
+    for n in args.sizes:
+        for density in args.densities:
+            compiled_path, blocked_fraction, source, dest = make_world(args.out, n, density, args.seed)
+            for algorithm in args.algorithms:
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    result = pool.submit(measure, compiled_path, algorithm, source, dest).result()
+                row = {"size": n, "density": density, "blocked_fraction": round(blocked_fraction, 4),
+                       "algorithm": algorithm, **result}
+                rows.append(row)
+                cost = "-" if row["path_cost"] is None else f"{row['path_cost']:g}"
+                peak = "-" if row["peak_rss_mb"] is None else f"{row['peak_rss_mb']:.1f}"
+                print(f"{n:>6} {density:>7} {algorithm:>6} {cost:>8} {row['nodes_expanded']:>10} "
+                      f"{row['seconds']:>9.3f} {peak:>8}")
+
+    with open(os.path.join(args.out, "results.json"), "w") as f:
+        json.dump(rows, f, indent=2)
+    with open(os.path.join(args.out, "results.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Wrote {len(rows)} runs to {args.out}")
+
+if __name__ == "__main__":
+    main()
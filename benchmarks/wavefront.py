@@ -0,0 +1,31 @@
+# times the wavefront BFS against the cell-at-a-time bfs on the worlds from search_scaling, 50x50 up to 4000x4000
+# both have to agree on the number of steps
+# run from the repository root: python -m benchmarks.wavefront [size ...]
+import sys
+import time
+
+from benchmarks.search_scaling import make_world
+from search import bfs
+from wavefront import wavefront_bfs
+
+SIZES = [50, 100, 200, 500, 1000, 2000, 4000]
+
+def timed(engine, world, source, dest):
+    start = time.perf_counter()
+    path, path_cost, nodes_expanded = engine(world, source, dest)
+    return path_cost, nodes_expanded, time.perf_counter() - start
+
+def main(sizes):
+    print(f"{'size':>6} {'steps':>6} {'BFS expanded':>12} {'BFS s':>8} {'WAVE expanded':>13} {'WAVE s':>8} {'speedup':>8}")
+    for n in sizes:
+        world = make_world(n)
+        source = world.cell_id(0, 0)
+        dest = world.cell_id(n - 1, 0)
+        bfs_cost, bfs_expanded, bfs_seconds = timed(bfs, world, source, dest)
+        wave_cost, wave_expanded, wave_seconds = timed(wavefront_bfs, world, source, dest)
+        assert bfs_cost == wave_cost
+        print(f"{n:>6} {wave_cost:>6} {bfs_expanded:>12} {bfs_seconds:>8.3f} {wave_expanded:>13} {wave_seconds:>8.3f} "
+              f"{bfs_seconds / wave_seconds:>7.1f}x")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
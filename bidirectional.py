@@ -0,0 +1,82 @@
+from utils import SearchState
+
+# Bidirectional search: one search grows from the source, the other from the destination over reversed
+# steps, and the path is spliced through the cell where they meet. It returns (solution path, path cost,
+# nodes expanded) like the searches in search.py, counting the expansions of both sides.
+#
+# Two breadth first searches that meet in the middle each only cover a diamond of half the path's length, so away
+# from the edges of the world they expand about half the cells one BFS does (39,602 against 69,501 for a
+# 200 step route in the middle of an open 400x400 world).
+#
+# There is no bidirectional A*. One with average potentials and the bidirectional Dijkstra stopping rule was tried
+# and dropped: the straight line already keeps plain A* close to the path, so there is little search left to split,
+# and it expanded more cells than A* on every world measured (1815 against 1666 on world1) while running two
+# frontiers.
+
+# the source part from the forward parents, then the backward parents followed towards the destination
+def splice(forward, backward, meet):
+    return forward.path(meet) + backward.path(meet)[::-1][1:]
+
+# the searches only ever step onto free cells, so a blocked destination is unreachable
+def trivial_result(world, source, dest):
+    if source == dest:
+        return [source], 0, 0
+    if world.is_blocked(*world.cell_xy(dest)):
+        return [], 0, 0
+    return None
+
+# the search states of the two sides, with the source and the destination visited
+def start_sides(world, source, dest):
+    forward, backward = SearchState(world.size), SearchState(world.size)
+    forward.visit(source)
+    backward.visit(dest)
+    return forward, backward
+
+# expands one node of the layer being grown on side 'this': visits its new children and appends them to 'grown'
+# returns the shortest (length, cell) meeting with the other side among those children, or None
+# the steps are shared with the stream in streaming.py
+def expand_layer_node(world, this, other, node, grown):
+    best = None
+    for child in world.neighbors(node):
+        if this.visited[child]:
+            continue
+        this.visit(child, node, this.g[node] + 1)
+        if other.visited[child]:
+            length = this.g[child] + other.g[child]
+            if best is None or length < best[0]:
+                best = (length, child)
+        grown.append(child)
+    return best
+
+# breadth first search from both ends, always growing the side with the smaller frontier by one whole layer
+# a layer that meets the other side is finished before stopping, so the shortest of its meetings is used
+def bidirectional_bfs(world, source, dest):
+    result = trivial_result(world, source, dest)
+    if result is not None:
+        return result
+
+    nodes_expanded = 0
+    forward, backward = start_sides(world, source, dest)
+    forward_layer, backward_layer = [source], [dest]
+
+    while forward_layer and backward_layer:
+        grow_forward = len(forward_layer) <= len(backward_layer)
+        this, other = (forward, backward) if grow_forward else (backward, forward)
+        layer = forward_layer if grow_forward else backward_layer
+
+        best = None
+        grown = []
+        for node in layer:
+            nodes_expanded += 1
+            meeting = expand_layer_node(world, this, other, node, grown)
+            if meeting is not None and (best is None or meeting[0] < best[0]):
+                best = meeting
+
+        if best is not None:
+            return splice(forward, backward, best[1]), int(best[0]), nodes_expanded
+        if grow_forward:
+            forward_layer = grown
+        else:
+            backward_layer = grown
+
+    return [], 0, nodes_expanded
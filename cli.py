@@ -0,0 +1,156 @@
+import argparse
+import functools
+import json
+import sys
+import time
+
+import instrument
+from anytime import anytime_search
+from search import ALGORITHMS, PROBED_ENGINES, compile_world_files, load_world
+
+# Headless entry point, for scripts and timing runs:
+#   python cli.py route TestingGrid/world1_enclosures.txt TestingGrid/world1_turfs.txt 8,10 43,45 --algorithm A*
+#   python cli.py compile TestingGrid/world1_enclosures.txt TestingGrid/world1_turfs.txt world1.npz
+#   python cli.py route world1.npz 8,10 43,45
+
+def parse_point(text):
+    try:
+        x, y = text.split(',')
+        return int(x), int(y)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected x,y but got {text!r}")
+
+# polygon files or a compiled world, which is given alone
+def open_world(args):
+    try:
+        return load_world(args.enclosures, args.turfs)
+    except ValueError as e:
+        sys.exit(str(e))
+
+def route(args):
+    world = open_world(args)
+    for x, y in (args.source, args.dest):
+        if not (0 <= x < world.width and 0 <= y < world.height):
+            sys.exit(f"({x}, {y}) is outside the {world.width}x{world.height} world")
+    engine = ALGORITHMS[args.algorithm]
+    source, dest = world.cell_id(*args.source), world.cell_id(*args.dest)
+    improvements = []
+    if args.budget is not None:
+        if args.algorithm != "ARA*":
+            sys.exit("--budget only applies to ARA*")
+        engine = functools.partial(anytime_search, budget=args.budget, on_improve=improvements.append)
+    start = time.perf_counter()
+    if args.metrics:
+        if engine not in PROBED_ENGINES:
+            sys.exit(f"--metrics isn't supported for {args.algorithm}")
+        with instrument.JsonlSink(args.metrics) as sink:
+            path, path_cost, nodes_expanded = instrument.run_probed(args.algorithm, engine, world, source, dest, [sink])
+    else:
+        path, path_cost, nodes_expanded = engine(world, source, dest)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "algorithm": args.algorithm,
+        "source": args.source,
+        "dest": args.dest,
+        "found": bool(path),
+        "path_cost": path_cost,
+        "nodes_expanded": nodes_expanded,
+        "seconds": elapsed,
+        "path": [world.cell_xy(cell) for cell in path],
+    }
+    if improvements:
+        result["improvements"] = [{"path_cost": s.path_cost, "bound": s.bound, "weight": s.weight,
+                                   "nodes_expanded": s.nodes_expanded, "seconds": s.seconds} for s in improvements]
+    if args.png or args.video:
+        # imported here so plain routing never loads matplotlib
+        import render
+        path_xy = result["path"]
+        if args.png:
+            render.save_png(args.png, world, args.source, args.dest, [(path_xy, "orange")] if path else [])
+        if args.video and path:
+            try:
+                render.save_animation(args.video, world, path_xy, source=args.source, dest=args.dest)
+            except RuntimeError as e:
+                sys.exit(str(e))
+
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"Name: {args.algorithm}")
+        for solution in improvements:
+            print(f"Improved after {solution.seconds * 1000:.1f} ms: {solution}")
+        print(f"Path cost: {path_cost}" if path else "Failed to find the destination")
+        print(f"Nodes expanded: {nodes_expanded}")
+        print(f"Seconds: {elapsed:.4f}")
+        if args.path:
+            print(" ".join(f"{x},{y}" for x, y in result["path"]))
+    return 0 if path else 1
+
+def portfolio(args):
+    from portfolio import run_portfolio, found_path
+    world = open_world(args)
+    results = run_portfolio(world, world.cell_id(*args.source), world.cell_id(*args.dest), args.algorithms,
+                            args.timeout, found_path if args.first else None)
+    for result in results:
+        result["path"] = [world.cell_xy(cell) for cell in result["path"]]
+        if args.json:
+            print(json.dumps(result))
+        elif result["status"] == "done":
+            print(f"{result['algorithm']}: path cost {result['path_cost']}, {result['nodes_expanded']} nodes expanded, "
+                  f"{result['seconds']:.4f}s" + (" (first)" if result.get("winner") else ""))
+        else:
+            print(f"{result['algorithm']}: {result['status']} after {result['seconds']:.4f}s")
+    return 0 if any(result["path"] for result in results) else 1
+
+def compile_files(args):
+    # saved with an .npz extension, which route and portfolio look for
+    output = args.output if args.output.endswith(".npz") else args.output + ".npz"
+    world = compile_world_files(args.enclosures, args.turfs, output)
+    print(f"Compiled a {world.width}x{world.height} world to {output}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the grid searches without the menu or a plot window.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    route_parser = commands.add_parser("route", help="find a path between two cells")
+    route_parser.add_argument("enclosures", help="enclosure polygon file, or a world compiled with 'compile'")
+    route_parser.add_argument("turfs", nargs="?", help="turf polygon file (left out for a compiled world)")
+    route_parser.add_argument("source", type=parse_point, help="source cell as x,y")
+    route_parser.add_argument("dest", type=parse_point, help="destination cell as x,y")
+    route_parser.add_argument("-a", "--algorithm", choices=list(ALGORITHMS), default="A*")
+    route_parser.add_argument("--json", action="store_true", help="print the result as one JSON object")
+    route_parser.add_argument("--path", action="store_true", help="also print the cells of the path")
+    route_parser.add_argument("--metrics", metavar="FILE",
+                              help="append the counters and timers of the run to FILE as a JSON line (BFS, DFS, GBFS, A* and the ALT searches only)")
+    route_parser.add_argument("--budget", type=float, metavar="SECONDS",
+                              help="time budget for ARA*, which returns the best path found by then")
+    route_parser.add_argument("--png", metavar="FILE", help="draw the world and the path to a PNG file")
+    route_parser.add_argument("--video", metavar="FILE", help="write the path being drawn as an .mp4 (needs ffmpeg) or .gif")
+    route_parser.set_defaults(run=route)
+
+    portfolio_parser = commands.add_parser("portfolio", help="run several searches at once in separate processes")
+    portfolio_parser.add_argument("enclosures", help="enclosure polygon file, or a world compiled with 'compile'")
+    portfolio_parser.add_argument("turfs", nargs="?", help="turf polygon file (left out for a compiled world)")
+    portfolio_parser.add_argument("source", type=parse_point, help="source cell as x,y")
+    portfolio_parser.add_argument("dest", type=parse_point, help="destination cell as x,y")
+    portfolio_parser.add_argument("-a", "--algorithms", nargs="+", choices=list(ALGORITHMS),
+                                  default=["BFS", "DFS", "GBFS", "A*"])
+    portfolio_parser.add_argument("--timeout", type=float, metavar="SECONDS", help="time budget for each search")
+    portfolio_parser.add_argument("--first", action="store_true",
+                                  help="stop the other searches as soon as one finds a path")
+    portfolio_parser.add_argument("--json", action="store_true", help="print each result as a JSON line")
+    portfolio_parser.set_defaults(run=portfolio)
+
+    compile_parser = commands.add_parser("compile", help="rasterize a world into a compiled .npz file")
+    compile_parser.add_argument("enclosures", help="enclosure polygon file")
+    compile_parser.add_argument("turfs", help="turf polygon file")
+    compile_parser.add_argument("output", help="where to write the compiled world")
+    compile_parser.set_defaults(run=compile_files)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import numpy as np
+
+from utils import LRUCache
+from world import DIRECTIONS, OPEN_COST, TURF_COST, cell_bits
+
+# step costs in half units so every distance is an exact integer
+OPEN_UNITS = int(OPEN_COST * 2)
+TURF_UNITS = int(TURF_COST * 2)
+UNREACHED = np.iinfo(np.int32).max
+
+# fields by (world fingerprint, destination), bounded by their bytes since a field takes 4 bytes per cell
+# (400MB on a 10,000 x 10,000 world)
+FIELD_CACHE_BYTES = 1 << 30
+field_cache = LRUCache(FIELD_CACHE_BYTES, sizeof=lambda field: field.units.nbytes)
+
+class DistanceField:
+    """
+      The optimal cost to go from every cell of a world to one destination,
+      with the same turf-aware step costs as A*. Once built, the optimal path
+      from any source is a walk downhill through the field, O(path length).
+    """
+    def __init__(self, world, dest, units, settled):
+        self.world = world
+        self.dest = dest
+        # cost to go in half units, UNREACHED where the destination can't be reached
+        self.units = units
+        self.units_view = units.data
+        # number of cells the wavefront settled while building the field
+        self.settled = settled
+
+    def source_units(self, source):
+        # the wavefront never enters enclosures, but the searches still start from a source inside one
+        units = self.units_view[source]
+        if units == UNREACHED:
+            for child in self.world.neighbors(source):
+                if self.units_view[child] != UNREACHED:
+                    units = min(units, self.units_view[child] + step_units(self.world, child))
+        return units
+
+    def cost(self, source):
+        "Optimal path cost from 'source' to the destination, or None if it can't reach it"
+        units = self.source_units(source)
+        if units == UNREACHED:
+            return None
+        return units / 2
+
+    def path(self, source):
+        "Optimal path from 'source' to the destination as cell ids, empty if unreachable"
+        world = self.world
+        units = self.units_view
+        remaining = self.source_units(source)
+        if remaining == UNREACHED:
+            return []
+        path = [source]
+        cell = source
+        while cell != self.dest:
+            # a neighbor on an optimal path is exactly its own step cost further downhill
+            for child in world.neighbors(cell):
+                if units[child] != UNREACHED and units[child] + step_units(world, child) == remaining:
+                    cell = child
+                    break
+            remaining = units[cell]
+            path.append(cell)
+        return path
+
+def step_units(world, cell):
+    return TURF_UNITS if world.step_cost(cell) == TURF_COST else OPEN_UNITS
+
+# Dijkstra from the destination with every step cost a whole number of half units (Dial's buckets)
+# each bucket holds all the cells at one distance and is relaxed as a single numpy batch
+# moving onto a cell costs that cell's step cost, so a settled cell at distance k puts its neighbors at k + its own cost
+def compute_distance_field(world, dest):
+    width, height = world.width, world.height
+    blocked_bits = np.asarray(world.blocked_bits)
+    turf_bits = np.asarray(world.turf_bits)
+    units = np.full(world.size, UNREACHED, dtype=np.int32)
+    units[dest] = 0
+    settled = 0
+
+    buckets = {0: [np.array([dest], dtype=np.int64)]}
+    if world.is_blocked(*world.cell_xy(dest)):
+        buckets = {}
+
+    while buckets:
+        k = min(buckets)
+        cells = np.unique(np.concatenate(buckets.pop(k)))
+        # drop cells that were queued here but later reached more cheaply
+        cells = cells[units[cells] == k]
+        settled += len(cells)
+        turf = cell_bits(turf_bits, cells).astype(bool)
+
+        # the cheaper group goes first so a neighbor reached by both ends up with the lower cost
+        for group, step in [(cells[~turf], OPEN_UNITS), (cells[turf], TURF_UNITS)]:
+            if len(group) == 0:
+                continue
+            xs, ys = group % width, group // width
+            for dx, dy in DIRECTIONS:
+                child_x, child_y = xs + dx, ys + dy
+                inside = (child_x >= 0) & (child_x < width) & (child_y >= 0) & (child_y < height)
+                children = child_y[inside] * width + child_x[inside]
+                children = children[cell_bits(blocked_bits, children) == 0]
+                children = children[units[children] > k + step]
+                if len(children):
+                    units[children] = k + step
+                    buckets.setdefault(k + step, []).append(children)
+
+    return DistanceField(world, dest, units, settled)
+
+# returns the cached field for this world and destination, building it on a miss
+def distance_field(world, dest):
+    key = (world.fingerprint(), dest)
+    field = field_cache.get(key)
+    if field is None:
+        field = compute_distance_field(world, dest)
+        field_cache.put(key, field)
+    return field
+
+# one-to-all mode with the same signature as the searches in search.py
+# nodes expanded counts the cells walked, plus the cells settled if the field had to be built for this call
+def field_search(world, source, dest):
+    misses = field_cache.misses
+    field = distance_field(world, dest)
+    path = field.path(source)
+    nodes_expanded = len(path)
+    if field_cache.misses != misses:
+        nodes_expanded += field.settled
+    path_cost = field.cost(source) if path else 0
+    return path, path_cost, nodes_expanded
@@ -0,0 +1,51 @@
+# Events of the streaming searches (see streaming.py)
+#
+# They live apart from the streams so the search modules that make them, such as anytime.py, don't have to import
+# streaming.py, which imports them.
+
+class Expanded:
+    "A node taken off the frontier, after its children were generated"
+    __slots__ = ('cell', 'g', 'frontier_delta', 'frontier_size', 'side')
+
+    def __init__(self, cell, g, frontier_delta, frontier_size, side=None):
+        self.cell = cell
+        # path cost to the cell so far, None for the searches that don't track it
+        self.g = g
+        # change in frontier size made by this expansion, the pop included
+        self.frontier_delta = frontier_delta
+        self.frontier_size = frontier_size
+        # "forward" or "backward" for the bidirectional searches, where g is counted from that side's end
+        self.side = side
+
+    def __repr__(self):
+        side = "" if self.side is None else f", side={self.side!r}"
+        return f"Expanded(cell={self.cell}, g={self.g}, frontier_delta={self.frontier_delta}, frontier_size={self.frontier_size}{side})"
+
+class Finished:
+    "The last event of every stream, the path is empty when the destination can't be reached"
+    __slots__ = ('path', 'path_cost', 'nodes_expanded')
+
+    def __init__(self, path, path_cost, nodes_expanded):
+        self.path = path
+        self.path_cost = path_cost
+        self.nodes_expanded = nodes_expanded
+
+    def result(self):
+        return self.path, self.path_cost, self.nodes_expanded
+
+    def __repr__(self):
+        return f"Finished(path_cost={self.path_cost}, nodes_expanded={self.nodes_expanded}, steps={len(self.path) - 1})"
+
+class ExpandedLayer:
+    "All the cells of one wavefront layer, expanded at once"
+    __slots__ = ('cells', 'frontier_delta', 'frontier_size')
+
+    def __init__(self, cells, frontier_delta, frontier_size):
+        # numpy array of cell ids
+        self.cells = cells
+        # the next layer's size minus this one's
+        self.frontier_delta = frontier_delta
+        self.frontier_size = frontier_size
+
+    def __repr__(self):
+        return f"ExpandedLayer(cells={len(self.cells)}, frontier_delta={self.frontier_delta}, frontier_size={self.frontier_size})"
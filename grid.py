@@ -1,42 +1,56 @@
-import matplotlib.pyplot as plt
+import math
+import weakref
+
+# matplotlib is only imported once a board is drawn, so headless searches never pay for it
 
 MAX = 50
+# past this many lines per axis the grid is drawn with only every k-th line
+MAX_GRID_LINES = 100
 
-class Point:
+# the four moves, in the order every search generates neighbors
+DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
 
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.children = []
-        self.directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-        self.parent = None
-        self.heuristic = 0
-        #inside an enclosure 
-        self.inside = False
+class Point:
+    """
+      A grid coordinate. Points are interned: Point(x, y) returns the same
+      object for as long as one is in use, so they must never be modified.
+      Search state (parents, costs, visited flags) is kept by the searches
+      themselves, per cell id, never on the Point.
+    """
+    __slots__ = ('x', 'y', '__weakref__')
+    # shared by every Point
+    directions = DIRECTIONS
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, x, y):
+        point = cls._interned.get((x, y))
+        if point is None:
+            point = object.__new__(cls)
+            point.x = x
+            point.y = y
+            cls._interned[x, y] = point
+        return point
 
     def __str__(self):
         return f'({self.x}, {self.y})'
+
+    def __repr__(self):
+        return f'Point({self.x}, {self.y})'
     
     def __eq__(self, other) :
         if self.x == other.x and self.y == other.y:
             return True
         else:
             return False
+
+    def __hash__(self):
+        return hash((self.x, self.y))
         
     def to_tuple(self):
         return self.x, self.y
-    
-    def set_children(self, children):
-        for child in children:
-            child.parent = self
-            self.children.append(child)
-    
-    def reset_state(self):
-        self.children = []
-        self.parent = None
-        self.heuristic = 0
 
 def draw_board():
+    import matplotlib.pyplot as plt
     # create a figure to draw the board
     fig = plt.figure(figsize=[8,8])
     # set the background color
@@ -45,15 +59,34 @@ def draw_board():
     # turn off the axes
     ax.set_axis_off()
     return fig, ax
-def draw_grids(ax):
-    # draw the vertical lines
-    for x in range(MAX):
-        ax.plot([x, x], [0,MAX-1], color = '0.75', linestyle='dotted')
-    # draw the horizontal lines
-    for y in range(MAX):
-        ax.plot([0, MAX-1], [y,y], color = '0.75', linestyle='dotted')
+def draw_grids(ax, width=MAX, height=MAX):
+    from matplotlib.collections import LineCollection
+    # downsample so large worlds don't draw thousands of lines
+    x_step = math.ceil(width / MAX_GRID_LINES)
+    y_step = math.ceil(height / MAX_GRID_LINES)
+    # every vertical and horizontal line goes into one artist
+    lines = [[(x, 0), (x, height-1)] for x in range(0, width, x_step)]
+    lines += [[(0, y), (width-1, y)] for y in range(0, height, y_step)]
+    ax.add_collection(LineCollection(lines, colors='0.75', linestyles='dotted', linewidths=1))
+    ax.autoscale_view()
     ax.set_position([0,0.02,1,1])
 
+# draws a list of polygons (lists of (x, y) tuples) as one outline artist plus one artist for all their vertices
+def draw_polygons(ax, polygons, color):
+    from matplotlib.collections import PolyCollection
+    if not polygons:
+        return
+    ax.add_collection(PolyCollection(polygons, closed=True, facecolors='none', edgecolors=color, linewidths=1.5))
+    xs = [x for polygon in polygons for x, y in polygon]
+    ys = [y for polygon in polygons for x, y in polygon]
+    ax.plot(xs, ys, 'o', linestyle='none', markersize=4, markeredgecolor=color, markerfacecolor=color, markeredgewidth=1)
+
+# a whole path of (x, y) tuples as a single line
+def draw_path(ax, path, c, alpha):
+    xs = [x for x, y in path]
+    ys = [y for x, y in path]
+    return ax.plot(xs, ys, c, alpha=alpha)[0]
+
 def draw_point(ax, x, y):
     ax.plot(x,y,'o',markersize=4,
         markeredgecolor=(0,0,0),
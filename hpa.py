@@ -0,0 +1,239 @@
+import heapq
+
+import numpy as np
+
+from utils import LRUCache
+from world import cached_table, cell_distance
+
+# Hierarchical pathfinding (HPA*)
+#
+# The grid is cut into square clusters. Wherever two neighboring clusters share a run of free cells along their
+# border, one or two transitions are placed on it, and the cells on both sides become nodes of an abstract graph.
+# Nodes of the same cluster are joined by their cheapest path inside that cluster. A query links the source and
+# destination into their clusters, runs A* over the small abstract graph and then refines only the clusters on
+# the abstract path back into cells. Paths stay inside the chosen clusters, so they can be slightly longer than
+# the true optimum.
+
+CLUSTER_SIZE = 10
+# runs of free border cells at least this long get a transition at each end instead of one in the middle
+LONG_ENTRANCE = 6
+# bump when the saved format changes so old cache files are ignored
+CACHE_VERSION = 1
+
+# abstractions by (world fingerprint, cluster size)
+abstraction_cache = LRUCache(8)
+
+class Abstraction:
+    """
+      The abstract graph of a world: entrance cells as nodes, with edges
+      between the two cells of every transition and between the entrances
+      of the same cluster. Edges are directed because a step costs the
+      cell being moved onto.
+    """
+    def __init__(self, world, cluster_size, edge_src, edge_dst, edge_cost):
+        self.world = world
+        self.cluster_size = cluster_size
+        self.edge_src = edge_src
+        self.edge_dst = edge_dst
+        self.edge_cost = edge_cost
+        self.edges = {}
+        self.cluster_nodes = {}
+        for src, dst, cost in zip(edge_src.tolist(), edge_dst.tolist(), edge_cost.tolist()):
+            self.edges.setdefault(src, []).append((dst, cost))
+        for node in set(edge_src.tolist()) | set(edge_dst.tolist()):
+            self.cluster_nodes.setdefault(self.cluster_of(node), []).append(node)
+
+    def cluster_of(self, cell):
+        x, y = self.world.cell_xy(cell)
+        return x // self.cluster_size, y // self.cluster_size
+
+    def bounds(self, cluster):
+        "(x0, y0, x1, y1) of a cluster, inclusive"
+        cx, cy = cluster
+        size = self.cluster_size
+        return (cx * size, cy * size,
+                min((cx + 1) * size, self.world.width) - 1, min((cy + 1) * size, self.world.height) - 1)
+
+    def arrays(self):
+        "What cached_table saves"
+        return {"cluster_size": self.cluster_size, "edge_src": self.edge_src, "edge_dst": self.edge_dst,
+                "edge_cost": self.edge_cost}
+
+def load_saved(world, saved):
+    return Abstraction(world, int(saved["cluster_size"]), saved["edge_src"], saved["edge_dst"], saved["edge_cost"])
+
+# Dijkstra restricted to one cluster, from 'start' until the cluster runs out
+# given a 'goal' it is A* instead and stops once the goal is expanded
+# with backward=True the costs are of reaching 'start' from each cell instead (moving onto a cell costs that cell)
+# returns (costs by cell, parents by cell, nodes expanded)
+def cluster_search(world, start, bounds, goal=-1, backward=False):
+    x0, y0, x1, y1 = bounds
+    costs = {start: 0.0}
+    parents = {start: -1}
+    closed = set()
+    frontier = [(0.0, start)]
+    nodes_expanded = 0
+    while frontier:
+        _, node = heapq.heappop(frontier)
+        if node in closed:
+            continue
+        closed.add(node)
+        nodes_expanded += 1
+        if node == goal:
+            break
+        cost = costs[node]
+        step_back = world.step_cost(node)
+        for child in world.neighbors(node):
+            x, y = world.cell_xy(child)
+            if child in closed or x < x0 or x > x1 or y < y0 or y > y1:
+                continue
+            child_cost = cost + (step_back if backward else world.step_cost(child))
+            if child_cost < costs.get(child, float('inf')):
+                costs[child] = child_cost
+                parents[child] = node
+                priority = child_cost if goal == -1 else child_cost + cell_distance(world, child, goal)
+                heapq.heappush(frontier, (priority, child))
+    return costs, parents, nodes_expanded
+
+# the transitions along one border, 'cells' is a list of (inner cell, outer cell) pairs in order
+def border_transitions(world, cells):
+    transitions = []
+    run = []
+    for inner, outer in cells + [(None, None)]:
+        if inner is not None and not world.is_blocked(*world.cell_xy(inner)) and not world.is_blocked(*world.cell_xy(outer)):
+            run.append((inner, outer))
+            continue
+        if len(run) >= LONG_ENTRANCE:
+            transitions += [run[0], run[-1]]
+        elif run:
+            transitions.append(run[len(run) // 2])
+        run = []
+    return transitions
+
+def build_abstraction(world, cluster_size=CLUSTER_SIZE):
+    edges = {}
+    width, height = world.width, world.height
+    # transitions between each cluster and its right and upper neighbors
+    for x in range(cluster_size - 1, width - 1, cluster_size):
+        for y0 in range(0, height, cluster_size):
+            cells = [(world.cell_id(x, y), world.cell_id(x + 1, y)) for y in range(y0, min(y0 + cluster_size, height))]
+            for a, b in border_transitions(world, cells):
+                edges[a, b] = world.step_cost(b)
+                edges[b, a] = world.step_cost(a)
+    for y in range(cluster_size - 1, height - 1, cluster_size):
+        for x0 in range(0, width, cluster_size):
+            cells = [(world.cell_id(x, y), world.cell_id(x, y + 1)) for x in range(x0, min(x0 + cluster_size, width))]
+            for a, b in border_transitions(world, cells):
+                edges[a, b] = world.step_cost(b)
+                edges[b, a] = world.step_cost(a)
+
+    # cheapest paths between the entrances of each cluster
+    abstraction = Abstraction(world, cluster_size, *edge_arrays(edges))
+    for cluster, nodes in abstraction.cluster_nodes.items():
+        bounds = abstraction.bounds(cluster)
+        for node in nodes:
+            costs = cluster_search(world, node, bounds)[0]
+            for other in nodes:
+                if other != node and other in costs:
+                    edges[node, other] = costs[other]
+    return Abstraction(world, cluster_size, *edge_arrays(edges))
+
+def edge_arrays(edges):
+    keys = list(edges)
+    return (np.array([a for a, b in keys], dtype=np.int64), np.array([b for a, b in keys], dtype=np.int64),
+            np.array([edges[key] for key in keys], dtype=np.float64))
+
+# the abstraction for a world, from memory, then from the cache file next to the world files, then built
+def abstraction_for(world, cluster_size=CLUSTER_SIZE):
+    return cached_table(world, abstraction_cache, "hpa", cluster_size, CACHE_VERSION,
+                        lambda: build_abstraction(world, cluster_size), load_saved)
+
+# same signature and result as the searches in search.py
+# nodes expanded counts the abstract nodes plus every cell expanded while linking the endpoints and refining
+def hpa_search(world, source, dest):
+    if source == dest:
+        return [source], 0, 0
+    if world.is_blocked(*world.cell_xy(dest)):
+        return [], 0, 0
+
+    if world.is_blocked(*world.cell_xy(source)):
+        return blocked_source_search(world, source, dest)
+
+    abstraction = abstraction_for(world)
+    source_cluster, dest_cluster = abstraction.cluster_of(source), abstraction.cluster_of(dest)
+
+    # link the endpoints to the entrances of their own clusters
+    from_source, _, nodes_expanded = cluster_search(world, source, abstraction.bounds(source_cluster))
+    to_dest, _, expanded = cluster_search(world, dest, abstraction.bounds(dest_cluster), backward=True)
+    nodes_expanded += expanded
+
+    def successors(node):
+        if node == source:
+            links = [(n, from_source[n]) for n in abstraction.cluster_nodes.get(source_cluster, []) if n in from_source]
+            if dest in from_source:
+                links.append((dest, from_source[dest]))
+            # the source can itself be an entrance
+            return links + abstraction.edges.get(source, [])
+        links = abstraction.edges.get(node, [])
+        if node in to_dest and abstraction.cluster_of(node) == dest_cluster:
+            links = links + [(dest, to_dest[node])]
+        return links
+
+    # A* over the abstract graph
+    costs = {source: 0.0}
+    parents = {source: -1}
+    closed = set()
+    frontier = [(cell_distance(world, source, dest), source)]
+    while frontier:
+        _, node = heapq.heappop(frontier)
+        if node in closed:
+            continue
+        closed.add(node)
+        nodes_expanded += 1
+        if node == dest:
+            break
+        for child, cost in successors(node):
+            child_cost = costs[node] + cost
+            if child not in closed and child_cost < costs.get(child, float('inf')):
+                costs[child] = child_cost
+                parents[child] = node
+                heapq.heappush(frontier, (child_cost + cell_distance(world, child, dest), child))
+
+    if dest not in closed:
+        return [], 0, nodes_expanded
+
+    abstract_path = []
+    node = dest
+    while node != -1:
+        abstract_path.append(node)
+        node = parents[node]
+    abstract_path.reverse()
+
+    # refine each abstract edge, transitions are single steps and the rest stay inside one cluster
+    path = [source]
+    for a, b in zip(abstract_path, abstract_path[1:]):
+        if b in world.neighbors(a):
+            path.append(b)
+            continue
+        cluster = source_cluster if a == source else abstraction.cluster_of(a)
+        _, refine_parents, expanded = cluster_search(world, a, abstraction.bounds(cluster), goal=b)
+        nodes_expanded += expanded
+        segment = []
+        node = b
+        while node != a:
+            segment.append(node)
+            node = refine_parents[node]
+        path.extend(reversed(segment))
+
+    return path, costs[dest], nodes_expanded
+
+# a source inside an enclosure isn't linked to any cluster, the path can only leave it through a free neighbor
+def blocked_source_search(world, source, dest):
+    best = ([], 0, 0)
+    nodes_expanded = 0
+    for child in world.neighbors(source):
+        path, path_cost, expanded = hpa_search(world, child, dest)
+        nodes_expanded += expanded
+        if path and (not best[0] or world.step_cost(child) + path_cost < best[1]):
+            best = ([source] + path, world.step_cost(child) + path_cost, 0)
+    return best[0], best[1], nodes_expanded
@@ -0,0 +1,236 @@
+import json
+import time
+
+from grid import DIRECTIONS
+
+# Instrumentation for the searches
+#
+# bfs, dfs, gbfs and a_star take an optional probe. Given one, they swap their world, search state and frontier
+# for the wrappers below, which count and time every call on the way through. Without one the searches run exactly
+# as before, the only cost is a single check at the start of each search.
+#
+# A finished run becomes one flat record (see Probe.record) that is handed to every sink:
+#   MemorySink      keeps the records in a list
+#   JsonlSink       buffers records and appends them to a file as JSON lines
+#   CallbackSink    calls a function with each record, for a profiler or a live display
+
+# sinks the menu and the command line report every search to, empty means instrumentation is off
+sinks = []
+
+class Probe:
+    "Counters and timers for one search run"
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.nodes_generated = 0
+        self.peak_frontier = 0
+        self.reexpansions = 0
+        self.neighbor_calls = 0
+        # generating neighbors, without the collision checks
+        self.neighbor_seconds = 0.0
+        # looking up whether a neighbor is inside an enclosure
+        self.collision_checks = 0
+        self.collision_seconds = 0.0
+        # reads of the visited and closed flags
+        self.visited_checks = 0
+        self.visited_seconds = 0.0
+        self.queue_ops = 0
+        self.queue_seconds = 0.0
+
+    def wrap(self, world, state, frontier):
+        "Returns (world, state, frontier) wrapped so every call on them is counted and timed"
+        return ProbedWorld(world, self), ProbedState(state, self), ProbedQueue(frontier, self)
+
+    def record(self, path, path_cost, nodes_expanded, seconds):
+        "The metrics of the finished run as a flat dict"
+        return {
+            "algorithm": self.algorithm,
+            "found": bool(path),
+            "path_cost": path_cost,
+            "path_length": len(path),
+            "nodes_expanded": nodes_expanded,
+            "nodes_generated": self.nodes_generated,
+            "peak_frontier": self.peak_frontier,
+            "reexpansions": self.reexpansions,
+            "neighbor_calls": self.neighbor_calls,
+            "neighbor_seconds": self.neighbor_seconds,
+            "collision_checks": self.collision_checks,
+            "collision_seconds": self.collision_seconds,
+            "visited_checks": self.visited_checks,
+            "visited_seconds": self.visited_seconds,
+            "queue_ops": self.queue_ops,
+            "queue_seconds": self.queue_seconds,
+            "seconds": seconds,
+        }
+
+class ProbedWorld:
+    """
+      Times neighbor generation and, on their own, the collision checks
+      inside it. Everything else goes straight to the world.
+    """
+    def __init__(self, world, probe):
+        self.world = world
+        self.probe = probe
+
+    def __getattr__(self, name):
+        return getattr(self.world, name)
+
+    def neighbors(self, cell):
+        "Same as World.neighbors, with each blocked lookup timed as a collision check"
+        start = time.perf_counter()
+        probe = self.probe
+        world = self.world
+        width, height = world.width, world.height
+        blocked = world.blocked_view
+        x, y = cell % width, cell // width
+        children = []
+        collision_seconds = 0.0
+        for dx, dy in DIRECTIONS:
+            child_x = x + dx
+            child_y = y + dy
+            if 0 <= child_x < width and 0 <= child_y < height:
+                child = child_y * width + child_x
+                check_start = time.perf_counter()
+                is_blocked = (blocked[child >> 3] >> (child & 7)) & 1
+                collision_seconds += time.perf_counter() - check_start
+                probe.collision_checks += 1
+                if not is_blocked:
+                    children.append(child)
+        probe.collision_seconds += collision_seconds
+        probe.neighbor_seconds += time.perf_counter() - start - collision_seconds
+        probe.neighbor_calls += 1
+        return children
+
+class ProbedCells:
+    """
+      Times reads of a visited or closed array as visited checks. Setting
+      a closed flag that is already set means the cell is being expanded
+      again, which is counted as a re-expansion.
+    """
+    def __init__(self, cells, probe):
+        self.cells = cells
+        self.probe = probe
+
+    def __getitem__(self, cell):
+        start = time.perf_counter()
+        flag = self.cells[cell]
+        self.probe.visited_seconds += time.perf_counter() - start
+        self.probe.visited_checks += 1
+        return flag
+
+    def __setitem__(self, cell, flag):
+        if self.cells[cell]:
+            self.probe.reexpansions += 1
+        self.cells[cell] = flag
+
+class ProbedState:
+    "A SearchState whose visited and closed checks go through the probe"
+    def __init__(self, state, probe):
+        self.state = state
+        self.visited = ProbedCells(state.visited, probe)
+        self.closed = ProbedCells(state.closed, probe)
+        self.g = state.g
+        self.parent = state.parent
+        self.visit = state.visit
+        self.path = state.path
+
+class ProbedQueue:
+    """
+      Times every frontier operation and tracks the peak frontier size.
+      Every push or update counts as a generated node, including updates
+      that lower the priority of a node already on the frontier.
+    """
+    def __init__(self, frontier, probe):
+        self.frontier = frontier
+        self.probe = probe
+
+    def timed(self, operation, *args):
+        start = time.perf_counter()
+        result = operation(*args)
+        self.probe.queue_seconds += time.perf_counter() - start
+        self.probe.queue_ops += 1
+        return result
+
+    def added(self):
+        self.probe.nodes_generated += 1
+        size = len(self.frontier)
+        if size > self.probe.peak_frontier:
+            self.probe.peak_frontier = size
+
+    def push(self, item, *priority):
+        self.timed(self.frontier.push, item, *priority)
+        self.added()
+
+    def update(self, item, priority):
+        self.timed(self.frontier.update, item, priority)
+        self.added()
+
+    def pop(self):
+        return self.timed(self.frontier.pop)
+
+    def isEmpty(self):
+        return self.timed(self.frontier.isEmpty)
+
+    def __len__(self):
+        return len(self.frontier)
+
+# runs engine(world, source, dest, probe=...) and reports the record to 'to' (default: the registered sinks)
+# returns the usual (path, path cost, nodes expanded)
+def run_probed(algorithm, engine, world, source, dest, to=None):
+    probe = Probe(algorithm)
+    start = time.perf_counter()
+    path, path_cost, nodes_expanded = engine(world, source, dest, probe=probe)
+    seconds = time.perf_counter() - start
+    emit(probe.record(path, path_cost, nodes_expanded, seconds), sinks if to is None else to)
+    return path, path_cost, nodes_expanded
+
+def emit(record, to=None):
+    for sink in sinks if to is None else to:
+        sink(record)
+
+class MemorySink:
+    "Keeps every record in self.records"
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
+
+class JsonlSink:
+    """
+      Appends records to 'path' as one JSON object per line. Records are
+      buffered and written 'buffer_size' at a time, so a long batch opens the
+      file once per buffer instead of once per run. Call close (or use it as
+      a context manager) to write whatever is left.
+    """
+    def __init__(self, path, buffer_size=64):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = []
+
+    def __call__(self, record):
+        self.buffer.append(json.dumps(record))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            with open(self.path, "a") as f:
+                f.write("\n".join(self.buffer) + "\n")
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class CallbackSink:
+    "Calls 'callback' with each record"
+    def __init__(self, callback):
+        self.callback = callback
+
+    def __call__(self, record):
+        self.callback(record)
@@ -0,0 +1,175 @@
+from grid import DIRECTIONS
+from utils import IndexedPriorityQueue, SearchState, zeroed_array
+from world import OPEN_COST, cell_distance
+
+# Jump Point Search on the 4-connected grid
+#
+# Horizontal moves only keep going straight, a vertical neighbor is "forced" when the cell beside the previous
+# cell is not open ground, so the canonical path through it can't come from there. Vertical moves keep going
+# straight and also branch both ways horizontally, so a vertical jump stops wherever a horizontal jump from it
+# would find something. Only the cells a jump stops on are pushed, which skips the symmetric open-space paths.
+#
+# Skipping cells is only safe where all the alternative paths cost the same, so jumps only cross open ground:
+# a jump stops on the first turf cell it reaches, turf cells are expanded in every direction like the source,
+# and a turf cell beside the previous cell forces its neighbor just like an enclosure would.
+#
+# Where a jump stops depends only on the cells it crosses, so every cell a jump passes through stops at the same place.
+# Each result is remembered for all of them, which keeps the horizontal scans a vertical jump makes at every step from
+# crossing the same runs of open ground again and again: each cell is scanned at most once per direction.
+#
+# Jumps are bounded: every JUMP_LIMIT-th column stops a horizontal jump and every JUMP_LIMIT-th row a vertical one,
+# and the cell becomes a jump point as if it were forced. Without the bound a vertical jump through open ground runs
+# to the edge of the world, scanning every row it crosses both ways, so even a short query touched the whole world.
+# The stops are fixed columns and rows rather than a distance from where the jump started, so a jump still stops at
+# the same place from every cell it crosses.
+
+JUMP_LIMIT = 32
+
+# remembered jump results are stored as the stop cell + 2, 1 for a jump that stops nowhere and 0 for not known yet
+NO_STOP = 1
+
+class JumpGrid:
+    "Cell checks and the two jump directions for one world and destination"
+    def __init__(self, world, dest):
+        self.world = world
+        self.dest = dest
+        self.width = world.width
+        self.height = world.height
+        # remembered jump results by direction, the pages are only allocated where jumps go
+        self.stops = {direction: zeroed_array('I', world.size) for direction in ((1, 0), (-1, 0), (0, 1), (0, -1))}
+
+    def free(self, x, y):
+        return not self.world.is_blocked(x, y)
+
+    def open(self, x, y):
+        return self.free(x, y) and not self.world.is_turf(x, y)
+
+    def jump_horizontal(self, x, y, dx):
+        "Returns the cell a horizontal jump from (x, y) stops on, or None"
+        # the bit lookups are inlined, a scan can cross most of a row
+        width, height = self.width, self.height
+        blocked, turf = self.world.blocked_view, self.world.turf_view
+        stops = self.stops[dx, 0]
+        crossed = []
+        cell = y * width + x
+        while True:
+            known = stops[cell]
+            if known:
+                return self.remember(stops, crossed, known)
+            crossed.append(cell)
+            x += dx
+            if x < 0 or x >= width or (blocked[(cell + dx) >> 3] >> ((cell + dx) & 7)) & 1:
+                return self.remember(stops, crossed, NO_STOP)
+            previous, cell = cell, cell + dx
+            if cell == self.dest or (turf[cell >> 3] >> (cell & 7)) & 1 or x % JUMP_LIMIT == 0:
+                return self.remember(stops, crossed, cell + 2)
+            # a free cell above or below whose counterpart beside the previous cell isn't open ground
+            for dy in (1, -1):
+                if 0 <= y + dy < height:
+                    side, beside = cell + dy * width, previous + dy * width
+                    if not (blocked[side >> 3] >> (side & 7)) & 1 and \
+                            ((blocked[beside >> 3] >> (beside & 7)) & 1 or (turf[beside >> 3] >> (beside & 7)) & 1):
+                        return self.remember(stops, crossed, cell + 2)
+
+    def jump_vertical(self, x, y, dy):
+        "Returns the cell a vertical jump from (x, y) stops on, or None"
+        width = self.width
+        blocked, turf = self.world.blocked_view, self.world.turf_view
+        stops = self.stops[0, dy]
+        crossed = []
+        cell = y * width + x
+        while True:
+            known = stops[cell]
+            if known:
+                return self.remember(stops, crossed, known)
+            crossed.append(cell)
+            y += dy
+            cell += dy * width
+            if y < 0 or y >= self.height or (blocked[cell >> 3] >> (cell & 7)) & 1:
+                return self.remember(stops, crossed, NO_STOP)
+            if cell == self.dest or (turf[cell >> 3] >> (cell & 7)) & 1 or y % JUMP_LIMIT == 0:
+                return self.remember(stops, crossed, cell + 2)
+            if self.jump_horizontal(x, y, 1) is not None or self.jump_horizontal(x, y, -1) is not None:
+                return self.remember(stops, crossed, cell + 2)
+
+    def remember(self, stops, crossed, stop):
+        "Stores one jump result for every cell the jump crossed and returns the stop cell or None"
+        for cell in crossed:
+            stops[cell] = stop
+        return None if stop == NO_STOP else stop - 2
+
+    def directions(self, cell, parent):
+        "The directions to jump in from 'cell' given the cell it was reached from"
+        x, y = cell % self.width, cell // self.width
+        if parent == -1 or self.world.is_turf(x, y):
+            return list(DIRECTIONS)
+        px, py = parent % self.width, parent // self.width
+        if py == y:
+            dx = 1 if x > px else -1
+            directions = [(dx, 0)]
+            # the cell beside the one we came from, as seen from (x - dx, y)
+            for dy in (1, -1):
+                if self.free(x, y + dy) and not self.open(x - dx, y + dy):
+                    directions.append((0, dy))
+            return directions
+        dy = 1 if y > py else -1
+        return [(0, dy), (1, 0), (-1, 0)]
+
+    def jump(self, cell, dx, dy):
+        x, y = cell % self.width, cell // self.width
+        if dy == 0:
+            return self.jump_horizontal(x, y, dx)
+        return self.jump_vertical(x, y, dy)
+
+# the straight run between two jump points, inclusive of both ends
+def straight_line(world, start, end):
+    (x0, y0), (x1, y1) = world.cell_xy(start), world.cell_xy(end)
+    if y0 == y1:
+        step = 1 if x1 > x0 else -1
+        return [world.cell_id(x, y0) for x in range(x0, x1 + step, step)]
+    step = 1 if y1 > y0 else -1
+    return [world.cell_id(x0, y) for y in range(y0, y1 + step, step)]
+
+# the full path through a chain of jump points
+def jump_point_path(world, state, source, node):
+    jump_points = state.path(node)
+    path = [source]
+    for start, end in zip(jump_points, jump_points[1:]):
+        path.extend(straight_line(world, start, end)[1:])
+    return path
+
+# jumps from a jump point that was just closed and pushes or improves every jump point it reaches
+def relax_jump_points(world, grid, state, frontier, node, dest):
+    gn = state.g[node]
+    for dx, dy in grid.directions(node, state.parent[node] - 1):
+        child = grid.jump(node, dx, dy)
+        if child is None or state.closed[child]:
+            continue
+        # every cell before the one a jump stops on is open ground
+        steps = abs(child - node) // (world.width if dx == 0 else 1)
+        g_child = gn + (steps - 1) * OPEN_COST + world.step_cost(child)
+        if state.visited[child] and g_child >= state.g[child]:
+            continue
+        state.visit(child, node, g_child)
+        frontier.update(child, g_child + cell_distance(world, child, dest))
+
+# A* over jump points, same signature and path cost as search.a_star
+# nodes expanded counts only the jump points popped from the frontier
+def jump_point_search(world, source, dest):
+    nodes_expanded = 0
+    grid = JumpGrid(world, dest)
+    state = SearchState(world.size)
+    state.visit(source)
+
+    frontier = IndexedPriorityQueue()
+    frontier.push(source, cell_distance(world, source, dest))
+
+    while not frontier.isEmpty():
+        node = frontier.pop()
+        state.closed[node] = 1
+        nodes_expanded += 1
+        if node == dest:
+            return jump_point_path(world, state, source, node), state.g[node], nodes_expanded
+        relax_jump_points(world, grid, state, frontier, node, dest)
+
+    return [], 0, nodes_expanded
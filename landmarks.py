@@ -0,0 +1,137 @@
+import numpy as np
+
+from distance_field import OPEN_UNITS, TURF_UNITS, UNREACHED, compute_distance_field, step_units
+from utils import LRUCache
+from world import cached_table, cell_distance
+
+# Landmark (ALT) heuristics
+#
+# A few landmark cells are picked per world and the exact, turf-aware cost from every cell to each landmark is stored.
+# For any landmark L the triangle inequality gives two lower bounds on the cost d(v, t) from a cell v to the
+# destination t:
+#   d(v, t) >= d(v, L) - d(t, L)
+#   d(v, t) >= d(L, t) - d(L, v)
+# Moving onto a cell costs that cell, so costs are directed, but both directions of the same path only differ by the
+# costs of its two ends: d(L, v) = d(v, L) + cost(v) - cost(L). One table per landmark is enough for both bounds.
+# Each bound is a difference of potentials, so it is consistent, and so is their maximum with the straight line.
+# Behind a long wall the straight line can be far below the real cost while some landmark sees it exactly.
+#
+# Landmarks are picked farthest first: each one is the reachable cell farthest from the ones picked so far, which puts
+# them around the edges of the world where their bounds are tightest. Cells the landmarks can't reach (other
+# components, enclosed sources) fall back to the straight line.
+
+LANDMARKS = 8
+# landmarks used per query, the ones with the best bound between the source and the destination
+ACTIVE_LANDMARKS = 4
+# bump when the saved format changes so old cache files are ignored
+CACHE_VERSION = 1
+
+# landmark tables by (world fingerprint, number of landmarks), bounded by their bytes
+# (8 landmarks take 3.2GB on a 10,000 x 10,000 world, the tables in use are always kept)
+LANDMARK_CACHE_BYTES = 1 << 30
+landmark_cache = LRUCache(LANDMARK_CACHE_BYTES, sizeof=lambda landmarks: landmarks.units.nbytes)
+
+class Landmarks:
+    """
+      Landmark cells of a world and the cost from every cell to each of
+      them, in half units like the distance fields (UNREACHED where a cell
+      can't reach the landmark). Takes 4 bytes per cell per landmark.
+    """
+    def __init__(self, world, cells, units):
+        self.world = world
+        # cell ids of the landmarks
+        self.cells = cells
+        # int32 array of shape (landmarks, cells)
+        self.units = units
+        # indexing memoryviews is much cheaper than indexing numpy scalars
+        self.units_views = [row.data for row in units]
+
+    def bound_units(self, landmark, cell, dest):
+        "The better of the two triangle bounds through one landmark, in half units, or None if it doesn't apply"
+        row = self.units_views[landmark]
+        to_cell, to_dest = row[cell], row[dest]
+        if to_cell == UNREACHED or to_dest == UNREACHED:
+            return None
+        return max(to_cell - to_dest, to_dest - to_cell + step_units(self.world, dest) - step_units(self.world, cell))
+
+    def heuristic(self, source, dest):
+        """
+          A function of a cell id giving a lower bound on its cost to 'dest',
+          built from the landmarks with the best bound at 'source'
+        """
+        world = self.world
+        if world.is_blocked(*world.cell_xy(dest)):
+            return lambda cell: cell_distance(world, cell, dest)
+
+        # an enclosed source has no entries of its own, its neighbors pick the landmarks instead
+        starts = world.neighbors(source) if world.is_blocked(*world.cell_xy(source)) else [source]
+        scored = []
+        for landmark in range(len(self.cells)):
+            bounds = [self.bound_units(landmark, cell, dest) for cell in starts]
+            bounds = [bound for bound in bounds if bound is not None]
+            if bounds:
+                scored.append((max(bounds), landmark))
+        scored.sort(reverse=True)
+
+        # (units to each active landmark, units from the destination to it, step units of the destination)
+        active = [(self.units_views[landmark], self.units_views[landmark][dest], step_units(world, dest))
+                  for _, landmark in scored[:ACTIVE_LANDMARKS]]
+        turf_view = world.turf_view
+
+        def h(cell):
+            best = 0
+            cell_units = TURF_UNITS if (turf_view[cell >> 3] >> (cell & 7)) & 1 else OPEN_UNITS
+            for row, to_dest, dest_units in active:
+                to_cell = row[cell]
+                if to_cell == UNREACHED:
+                    continue
+                best = max(best, to_cell - to_dest, to_dest - to_cell + dest_units - cell_units)
+            return max(best / 2, cell_distance(world, cell, dest))
+        return h
+
+    def arrays(self):
+        "What cached_table saves"
+        return {"cells": self.cells, "units": self.units}
+
+def load_saved(world, saved):
+    if saved["units"].shape[1] != world.size:
+        return None
+    return Landmarks(world, saved["cells"], saved["units"])
+
+# picks 'count' landmarks farthest first and computes their tables, one distance field per landmark
+def build_landmarks(world, count=LANDMARKS):
+    width, height = world.width, world.height
+    free = np.flatnonzero(np.unpackbits(np.asarray(world.blocked_bits), bitorder='little')[:world.size] == 0)
+    if len(free) == 0:
+        return Landmarks(world, np.zeros(0, dtype=np.int64), np.zeros((0, world.size), dtype=np.int32))
+
+    # the search for the first landmark starts from the free cell nearest the middle
+    xs, ys = free % width, free // width
+    start = int(free[np.argmin((xs - width / 2) ** 2 + (ys - height / 2) ** 2)])
+    nearest = compute_distance_field(world, start).units.astype(np.int64)
+    cells = []
+    rows = []
+    for _ in range(count):
+        reached = np.where(nearest == UNREACHED, -1, nearest)
+        cell = int(np.argmax(reached))
+        if reached[cell] <= 0:
+            # every reachable cell is a landmark already
+            break
+        units = compute_distance_field(world, cell).units
+        # the middle cell only seeds the first pick, after that distances are to the nearest landmark
+        nearest = units.astype(np.int64) if not cells else np.minimum(nearest, units)
+        cells.append(cell)
+        rows.append(units)
+    return Landmarks(world, np.array(cells, dtype=np.int64), np.array(rows, dtype=np.int32).reshape(len(rows), world.size))
+
+# the landmarks for a world, from memory, then from the cache file next to the world files, then built
+def landmarks_for(world, count=LANDMARKS):
+    return cached_table(world, landmark_cache, "landmarks", count, CACHE_VERSION,
+                        lambda: build_landmarks(world, count), load_saved)
+
+# the landmark heuristic for one query, for the 'heuristic' argument of a_star and gbfs in search.py
+def landmark_heuristic(world, source, dest):
+    landmarks = landmarks_for(world)
+    if len(landmarks.cells) == 0:
+        return lambda cell: cell_distance(world, cell, dest)
+    return landmarks.heuristic(source, dest)
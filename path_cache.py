@@ -0,0 +1,93 @@
+from utils import LRUCache
+
+# searches whose paths are optimal, by the path cost they report
+# every part of an optimal path is itself optimal, so a cached path can answer queries between any two of its cells
+UNIT_COST = "steps"
+TURF_COST = "turf"
+OPTIMAL = {"BFS": UNIT_COST, "BiBFS": UNIT_COST, "WAVE": UNIT_COST, "A*": TURF_COST, "JPS": TURF_COST,
+           "FIELD": TURF_COST, "ALT": TURF_COST}
+
+# the cache is bounded by the cells of its paths, since each cached cell is indexed for slicing
+# (about 400 bytes per cell, so 1 << 18 cells take around 100MB), an unreachable result counts as one cell
+PATH_CACHE_CELLS = 1 << 18
+
+class CachedPath:
+    "A cached search result, with each cell's position on the path for slicing"
+    def __init__(self, path, path_cost, nodes_expanded):
+        self.path = path
+        self.path_cost = path_cost
+        self.nodes_expanded = nodes_expanded
+        self.positions = {cell: i for i, cell in enumerate(path)}
+
+class PathCache:
+    """
+      Remembers search results by (world fingerprint, algorithm, source,
+      dest), evicting the least recently used once their paths hold more
+      than 'max_cells' cells. Queries that miss can still be answered by
+      slicing a cached path of an optimal search that passes through both
+      endpoints in order.
+    """
+    def __init__(self, max_cells=PATH_CACHE_CELLS):
+        self.results = LRUCache(max_cells, sizeof=lambda cached: max(len(cached.path), 1))
+        # (world fingerprint, algorithm, cell) -> keys of the cached optimal paths through that cell
+        self.through = {}
+        self.subpath_hits = 0
+        # "hit", "subpath" or "miss" for the most recent search
+        self.last_lookup = None
+
+    def stats(self):
+        return {"hits": self.results.hits, "subpath_hits": self.subpath_hits, "misses": self.results.misses,
+                "size": len(self.results), "cells": self.results.size}
+
+    def clear(self):
+        self.__init__(self.results.maxsize)
+
+    def search(self, world, key, engine, source, dest):
+        "Runs 'engine' (the search called 'key') unless the cache can answer, returns (path, path cost, nodes expanded)"
+        fingerprint = world.fingerprint()
+        cache_key = (fingerprint, key, source, dest)
+        cached = self.results.get(cache_key)
+        if cached is not None:
+            self.last_lookup = "hit"
+            return cached.path, cached.path_cost, 0
+
+        if key in OPTIMAL:
+            sliced = self.slice(world, key, source, dest)
+            if sliced is not None:
+                self.last_lookup = "subpath"
+                self.subpath_hits += 1
+                return sliced
+
+        self.last_lookup = "miss"
+        path, path_cost, nodes_expanded = engine(world, source, dest)
+        self.store(fingerprint, key, cache_key, CachedPath(path, path_cost, nodes_expanded))
+        return path, path_cost, nodes_expanded
+
+    def slice(self, world, key, source, dest):
+        for cache_key in self.through.get((world.fingerprint(), key, source), ()):
+            cached = self.results.entries[cache_key]
+            start, end = cached.positions[source], cached.positions.get(dest, -1)
+            if end >= start:
+                # counts as a use of the path it came from
+                self.results.entries.move_to_end(cache_key)
+                path = cached.path[start:end + 1]
+                if OPTIMAL[key] == UNIT_COST:
+                    return path, len(path) - 1, 0
+                return path, sum(world.step_cost(cell) for cell in path[1:]), 0
+        return None
+
+    def store(self, fingerprint, key, cache_key, cached):
+        evicted = self.results.put(cache_key, cached)
+        if key in OPTIMAL:
+            for cell in cached.path:
+                self.through.setdefault((fingerprint, key, cell), set()).add(cache_key)
+        for evicted_key, evicted_path in evicted:
+            for cell in evicted_path.path:
+                keys = self.through.get((evicted_key[0], evicted_key[1], cell))
+                if keys is not None:
+                    keys.discard(evicted_key)
+                    if not keys:
+                        del self.through[evicted_key[0], evicted_key[1], cell]
+
+# shared by the menu and the batch API
+path_cache = PathCache()
@@ -0,0 +1,106 @@
+import multiprocessing
+import time
+from multiprocessing import connection, shared_memory
+
+from batch import share_world, attach_world
+from search import ALGORITHMS
+
+# Running several searches on one query at the same time
+#
+# Every algorithm gets its own process, attached to the world through shared memory, and sends its result back over
+# its own pipe. Only the calling process touches counters, summaries or the plot, so nothing is shared between the
+# searches. A process that runs past its time budget, or that is still running once an acceptable answer is in,
+# is terminated.
+
+PORTFOLIO = ["BFS", "DFS", "GBFS", "A*"]
+
+def portfolio_worker(pipe, shm_name, width, height, algorithm, source, dest):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    world = attach_world(shm, width, height)
+    try:
+        start = time.perf_counter()
+        path, path_cost, nodes_expanded = ALGORITHMS[algorithm](world, source, dest)
+        pipe.send({"status": "done", "path": path, "path_cost": path_cost, "nodes_expanded": nodes_expanded,
+                   "seconds": time.perf_counter() - start})
+    except Exception as e:
+        pipe.send({"status": "error", "error": f"{type(e).__name__}: {e}"})
+
+def empty_result(algorithm, status, seconds, **extra):
+    return {"algorithm": algorithm, "status": status, "path": [], "path_cost": 0, "nodes_expanded": 0,
+            "seconds": seconds, **extra}
+
+# runs each of 'algorithms' on (source, dest) cell ids in its own process
+# 'timeout' is a time budget in seconds for every algorithm, or a dict of budgets by algorithm (None means no limit)
+# with 'accept' (a function of a result), the first finished result it accepts wins and every search still running
+# is cancelled
+# returns one result per algorithm, in order: a dict with its status ("done", "timeout", "cancelled" or "error"),
+# path (cell ids), path cost, nodes expanded and seconds; the winner also has "winner": True
+def run_portfolio(world, source, dest, algorithms=PORTFOLIO, timeout=None, accept=None):
+    for algorithm in algorithms:
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {', '.join(ALGORITHMS)}")
+    budgets = timeout if isinstance(timeout, dict) else {algorithm: timeout for algorithm in algorithms}
+
+    results = {}
+    running = {}
+    shm = share_world(world)
+    try:
+        for algorithm in algorithms:
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=portfolio_worker, daemon=True,
+                                              args=(sender, shm.name, world.width, world.height, algorithm, source, dest))
+            process.start()
+            # the worker holds the only sending end, so a worker that dies shows up as EOF
+            sender.close()
+            running[receiver] = (algorithm, process, time.perf_counter())
+
+        def stop(receiver, status):
+            algorithm, process, started = running.pop(receiver)
+            process.terminate()
+            process.join()
+            receiver.close()
+            results[algorithm] = empty_result(algorithm, status, time.perf_counter() - started)
+
+        while running:
+            now = time.perf_counter()
+            deadlines = []
+            for receiver, (algorithm, process, started) in list(running.items()):
+                budget = budgets.get(algorithm)
+                if budget is None:
+                    continue
+                if now - started >= budget:
+                    stop(receiver, "timeout")
+                else:
+                    deadlines.append(started + budget - now)
+            if not running:
+                break
+
+            for receiver in connection.wait(list(running), timeout=min(deadlines, default=None)):
+                algorithm, process, started = running.pop(receiver)
+                try:
+                    message = receiver.recv()
+                except EOFError:
+                    message = {"status": "error", "error": f"the {algorithm} worker exited with code {process.exitcode}"}
+                process.join()
+                receiver.close()
+                result = empty_result(algorithm, message.pop("status"), time.perf_counter() - started)
+                result.update(message)
+                results[algorithm] = result
+                if accept is not None and result["status"] == "done" and accept(result):
+                    result["winner"] = True
+                    for other in list(running):
+                        stop(other, "cancelled")
+                    break
+    finally:
+        for receiver in list(running):
+            algorithm, process, started = running.pop(receiver)
+            process.terminate()
+            process.join()
+        shm.close()
+        shm.unlink()
+
+    return [results[algorithm] for algorithm in algorithms]
+
+# an 'accept' for run_portfolio: any path at all
+def found_path(result):
+    return bool(result["path"])
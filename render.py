@@ -0,0 +1,104 @@
+import math
+
+from grid import draw_grids, draw_polygons, draw_path
+
+# Drawing results quickly
+#
+# The grid, the polygons and each path are single artists (see draw_grids, draw_polygons, draw_path in grid.py),
+# so a redraw costs a handful of artists however large the world or long the path. Paths are animated with at most
+# MAX_FRAMES frames: a long path adds several segments per frame instead of one segment per pause.
+#
+# show_path animates into the open menu window by blitting only the path over a saved background.
+# save_png and save_animation draw on a bare Figure with no pyplot window, so they work headless.
+
+MAX_FRAMES = 60
+FPS = 30
+
+# the path lengths shown on each frame, at most max_frames of them and always ending with the whole path
+def frame_ends(length, max_frames=MAX_FRAMES):
+    step = max(1, math.ceil(length / max_frames))
+    return list(range(min(step, length), length, step)) + [length]
+
+# animates a path of (x, y) tuples into an interactive figure, returns the line so it can be removed later
+def show_path(fig, ax, path, color, alpha, max_frames=MAX_FRAMES):
+    import matplotlib.pyplot as plt
+    canvas = fig.canvas
+    line = draw_path(ax, [], color, alpha)
+    if not getattr(canvas, "supports_blit", False):
+        line.set_data([x for x, y in path], [y for x, y in path])
+        plt.pause(0.001)
+        return line
+
+    line.set_animated(True)
+    # make sure the window is up to date before its pixels are saved
+    plt.pause(0.001)
+    background = canvas.copy_from_bbox(fig.bbox)
+    xs = [x for x, y in path]
+    ys = [y for x, y in path]
+    for end in frame_ends(len(path), max_frames):
+        canvas.restore_region(background)
+        line.set_data(xs[:end], ys[:end])
+        ax.draw_artist(line)
+        canvas.blit(fig.bbox)
+        canvas.flush_events()
+    line.set_animated(False)
+    canvas.draw_idle()
+    return line
+
+# a figure with the world, its endpoints and the given paths, not attached to pyplot so no window ever opens
+# 'paths' is a list of (list of (x, y) tuples, color)
+def world_figure(world, source=None, dest=None, paths=(), size=8):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=[size, size])
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    ax.set_axis_off()
+    draw_world(ax, world)
+    if source is not None:
+        ax.plot(*source, 'o', markersize=4, color='b')
+    if dest is not None:
+        ax.plot(*dest, 'o', markersize=4, color='r')
+    for path, color in paths:
+        draw_path(ax, path, color, 0.5)
+    return fig, ax
+
+def draw_world(ax, world):
+    draw_grids(ax, world.width, world.height)
+    if world.polygons is not None:
+        enc_polygons, turf_polygons = world.polygons
+        draw_polygons(ax, enc_polygons, 'k')
+        draw_polygons(ax, turf_polygons, 'g')
+        return
+    # a world built from arrays has no polygons, its cells are shown instead
+    import numpy as np
+    shade = np.where(world.blocked_mask(), 0.0, np.where(world.cost_grid() > 1, 0.6, 1.0))
+    ax.imshow(shade, cmap='gray', vmin=0, vmax=1, origin='lower', interpolation='nearest', alpha=0.5,
+              extent=(-0.5, world.width - 0.5, -0.5, world.height - 0.5))
+
+def save_png(out_path, world, source=None, dest=None, paths=(), dpi=100):
+    fig, _ = world_figure(world, source, dest, paths)
+    fig.savefig(out_path, dpi=dpi)
+
+# writes the path being drawn as a video, .mp4 needs ffmpeg and .gif only needs Pillow
+def save_animation(out_path, world, path, color="orange", source=None, dest=None, max_frames=MAX_FRAMES, fps=FPS):
+    from matplotlib import animation
+    if out_path.endswith(".gif"):
+        writer = animation.PillowWriter(fps=fps)
+    elif animation.writers.is_available("ffmpeg"):
+        writer = animation.FFMpegWriter(fps=fps)
+    else:
+        raise RuntimeError(f"writing {out_path} needs ffmpeg, save a .gif instead")
+
+    fig, ax = world_figure(world, source, dest)
+    line = draw_path(ax, [], color, 0.5)
+    xs = [x for x, y in path]
+    ys = [y for x, y in path]
+
+    def draw_frame(end):
+        line.set_data(xs[:end], ys[:end])
+        return line,
+
+    frames = frame_ends(len(path), max_frames)
+    anim = animation.FuncAnimation(fig, draw_frame, frames=frames, blit=True, repeat=False)
+    anim.save(out_path, writer=writer)
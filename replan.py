@@ -0,0 +1,156 @@
+import math
+
+from grid import DIRECTIONS
+from utils import IndexedPriorityQueue
+from world import cell_distance, edit_world
+
+# Incremental replanning with D* Lite
+#
+# The search runs backward from the destination, so g(cell) is the cost of the cheapest path from the cell to the
+# destination and rhs(cell) is the one-step lookahead of it through the cell's free neighbors. A cell is queued while
+# the two disagree. When polygons are added or removed only the cells that changed and their neighbors are updated,
+# and the next plan expands just enough to make the values around the path consistent again, instead of searching
+# from scratch. Keys carry an offset km so the source can also move without re-keying the queue.
+#
+# Step costs are the same as everywhere else: moving onto a cell costs that cell, and enclosed cells can't be entered.
+
+INF = math.inf
+
+class IncrementalPlanner:
+    """
+      Keeps the search state for one destination across world edits. Call
+      plan() for the current path, then add or remove enclosures and turfs
+      through the planner (which edits the world in place) and plan again.
+      Each plan returns (path cells, path cost, nodes expanded by that
+      call), like the searches in search.py.
+    """
+    def __init__(self, world, source, dest):
+        self.world = world
+        self.source = source
+        self.last_source = source
+        self.dest = dest
+        self.km = 0.0
+        self.g = {}
+        self.rhs = {dest: 0.0}
+        self.frontier = IndexedPriorityQueue()
+        self.frontier.push(dest, self.key(dest))
+
+    def key(self, cell):
+        best = min(self.g.get(cell, INF), self.rhs.get(cell, INF))
+        return best + cell_distance(self.world, self.source, cell) + self.km, best
+
+    # cells with an edge into 'cell': its neighbors that can be stood on, and the source even if it is enclosed
+    def predecessors(self, cell):
+        world = self.world
+        x, y = world.cell_xy(cell)
+        if world.is_blocked(x, y):
+            return []
+        cells = []
+        for dx, dy in DIRECTIONS:
+            if 0 <= x + dx < world.width and 0 <= y + dy < world.height:
+                other = world.cell_id(x + dx, y + dy)
+                if other == self.source or not world.is_blocked(x + dx, y + dy):
+                    cells.append(other)
+        return cells
+
+    def lookahead(self, cell):
+        world = self.world
+        g = self.g
+        return min((world.step_cost(child) + g.get(child, INF) for child in world.neighbors(cell)), default=INF)
+
+    def update_cell(self, cell):
+        if cell != self.dest:
+            self.rhs[cell] = self.lookahead(cell)
+        self.frontier.remove(cell)
+        if self.g.get(cell, INF) != self.rhs.get(cell, INF):
+            self.frontier.push(cell, self.key(cell))
+
+    def compute(self):
+        nodes_expanded = 0
+        frontier = self.frontier
+        g, rhs = self.g, self.rhs
+        source = self.source
+        while frontier and (frontier.peek()[0] < self.key(source) or g.get(source, INF) != rhs.get(source, INF)):
+            old_key, cell = frontier.peek()
+            new_key = self.key(cell)
+            if old_key < new_key:
+                # queued before the source moved, put back with its current key
+                frontier.remove(cell)
+                frontier.push(cell, new_key)
+                continue
+            frontier.pop()
+            nodes_expanded += 1
+            if g.get(cell, INF) > rhs.get(cell, INF):
+                # overconsistent, the cell's cost only went down
+                g[cell] = rhs[cell]
+                for other in self.predecessors(cell):
+                    self.update_cell(other)
+            else:
+                # underconsistent, the cell got more expensive, so everything that went through it is redone
+                g[cell] = INF
+                for other in self.predecessors(cell) + [cell]:
+                    self.update_cell(other)
+        return nodes_expanded
+
+    def plan(self):
+        "Repairs the search state and returns (path cells, path cost, nodes expanded)"
+        nodes_expanded = self.compute()
+        cost = self.rhs.get(self.source, INF)
+        if self.source == self.dest:
+            return [self.source], 0, nodes_expanded
+        if cost == INF:
+            return [], 0, nodes_expanded
+
+        # follow the cheapest next step from the source, every value on the way is consistent now
+        world = self.world
+        g = self.g
+        path = [self.source]
+        cell = self.source
+        while cell != self.dest:
+            cell = min(world.neighbors(cell), key=lambda child: world.step_cost(child) + g.get(child, INF))
+            path.append(cell)
+        return path, cost, nodes_expanded
+
+    def update(self, add_enclosures=(), remove_enclosures=(), add_turfs=(), remove_turfs=()):
+        """
+          Edits the world and marks the cells that changed, returns the
+          replanned (path cells, path cost, nodes expanded)
+        """
+        changed = edit_world(self.world, add_enclosures, remove_enclosures, add_turfs, remove_turfs)
+        self.cells_changed(changed.tolist())
+        return self.plan()
+
+    def cells_changed(self, cells):
+        "For edits made to the world some other way: updates the given cells and every cell stepping onto them"
+        touched = set()
+        for cell in cells:
+            touched.add(cell)
+            x, y = self.world.cell_xy(cell)
+            for dx, dy in DIRECTIONS:
+                if 0 <= x + dx < self.world.width and 0 <= y + dy < self.world.height:
+                    touched.add(self.world.cell_id(x + dx, y + dy))
+        for cell in touched:
+            # enclosed cells can't be stepped onto, their values don't matter until they are freed again
+            if cell == self.source or not self.world.is_blocked(*self.world.cell_xy(cell)):
+                self.update_cell(cell)
+
+    def add_enclosure(self, polygon):
+        return self.update(add_enclosures=[polygon])
+
+    def remove_enclosure(self, polygon):
+        return self.update(remove_enclosures=[polygon])
+
+    def add_turf(self, polygon):
+        return self.update(add_turfs=[polygon])
+
+    def remove_turf(self, polygon):
+        return self.update(remove_turfs=[polygon])
+
+    def move_source(self, source):
+        "Starts the path from 'source' instead, the search state is kept"
+        self.km += cell_distance(self.world, self.last_source, source)
+        self.last_source = source
+        self.source = source
+        # an enclosed source isn't a predecessor of anything, so its lookahead may never have been worked out
+        self.update_cell(source)
+        return self.plan()
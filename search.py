@@ -1,34 +1,40 @@
-import matplotlib.pyplot as plt
-import numpy as np
-import time
-import matplotlib.animation as animation
+import functools
 import math
-from shapely import geometry
+import os
+import time
 
 from utils import *
 from grid import *
-
-def reset_grid():
-    for x in range(50):
-        for y in range(50):
-            Point(x, y).reset_state()
-
-def reset_node(source, dest):
-    source.reset_state()
-    dest.reset_state()
-
-def best_cost(cost, frontier):
-    for node in frontier:
-        if (cost <= node.cost):
-            return True
-    return False
+from world import PolygonIndex, compile_world, cell_distance, cache_dir, file_digest, save_world, load_compiled_world
+from distance_field import field_search
+from jps import jump_point_search
+from bidirectional import bidirectional_bfs
+from hpa import hpa_search
+from wavefront import wavefront_bfs
+from anytime import anytime_search
+from landmarks import landmark_heuristic
+from path_cache import path_cache
+import instrument
+
+# a world file can start with a "# size W,H" line, otherwise the world is MAX x MAX
+def read_world_size(worldfilepath):
+    with open(worldfilepath, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("# size"):
+                width, height = line[len("# size"):].split(',')
+                return int(width), int(height)
+    return MAX, MAX
 
 def gen_polygons(worldfilepath):
     polygons = []
     with open(worldfilepath, "r") as f:
         lines = f.readlines()
-        lines = [line[:-1] for line in lines]
+        lines = [line.strip() for line in lines]
         for line in lines:
+            # skip blank lines and comments such as the size line
+            if not line or line.startswith('#'):
+                continue
             polygon = []
             pts = line.split(';')
             for pt in pts:
@@ -37,244 +43,332 @@ def gen_polygons(worldfilepath):
             polygons.append(polygon)
     return polygons
 
-method_counters = {"BFS" : 0, "DFS" : 0, "GBFS" : 0, "A*" : 0}
-def print_to_summary(key, total_cost, nodes_expanded):
+method_counters = {"BFS" : 0, "DFS" : 0, "GBFS" : 0, "A*" : 0, "JPS" : 0, "WAVE" : 0, "ARA*" : 0, "ALT" : 0, "ALT-GBFS" : 0}
+# notes are extra lines written after the nodes expanded
+def print_to_summary(key, total_cost, nodes_expanded, notes=()):
     with open("summary.txt", "a") as f:
         f.write(f"Name: {key}{method_counters[key]}\n")
         f.write(f"Path cost: {str(total_cost)}\n" )
-        f.write(f"Nodes expanded: {nodes_expanded}\n\n")
+        f.write(f"Nodes expanded: {nodes_expanded}\n")
+        for note in notes:
+            f.write(f"{note}\n")
+        f.write("\n")
 
 def distance(p1, p2):
     return math.sqrt((p2.x - p1.x)**2 + (p2.y - p1.y)**2)
 
 # starts at the end, and keeps grabbing the parent to trace to the big parent
-# solution path should never go inside an enclosed polygon so we can simply count the child.inside without worry
+# solution path never goes inside an enclosed polygon so every step after the source is either turf or open ground
 # set tf = True if you are running searches that require path cost calculation
-def reconstruct_solution_path(node, tf):
-    solution_path = []
+def reconstruct_solution_path(state, world, cell, tf):
+    solution_path = state.path(cell)
+    if not tf:
+        return solution_path, len(solution_path) - 1
     path_cost = 0
-    while node is not None:
-        solution_path.append(node)
-        if node.inside and tf:
-            path_cost += 1.5
-        else:
-            path_cost += 1
-        node = node.parent
-    solution_path.reverse()
-    return solution_path, path_cost-1
+    for step in solution_path[1:]:
+        path_cost += world.step_cost(step)
+    return solution_path, path_cost
 
 # checks for enclosure for both enclosed polygons and turfs
-def is_enclosed(point, polygon_list):
-    #print(f"({point.x}, {point.y})")
-    point = geometry.Point(point.x, point.y)
-    for polygon in polygon_list:
-        enclosure = geometry.Polygon(polygon)
-        buffered_enclosure = enclosure.buffer(0.25)
-        if buffered_enclosure.contains(point) or enclosure.touches(point):
-            return True
-    if point.x < 0 or point.x >= 50 or point.y < 0 or point.y >= 50: # the point can also be outside the canvas
+def is_enclosed(point, polygon_list, width=MAX, height=MAX):
+    if point.x < 0 or point.x >= width or point.y < 0 or point.y >= height: # the point can also be outside the canvas
         return True
-    
+    return polygon_index(polygon_list).contains(point.x, point.y)
+
+# polygon lists seen by is_enclosed, each buffered and indexed once
+# keyed by the list's identity and length, so a query never has to walk every vertex to find its index
+# (each entry holds on to its list, so the id can't be reused while it is cached)
+index_cache = LRUCache(8)
+
+def polygon_index(polygon_list):
+    key = (id(polygon_list), len(polygon_list))
+    cached = index_cache.get(key)
+    if cached is None or cached[0] is not polygon_list:
+        cached = (polygon_list, PolygonIndex(polygon_list))
+        index_cache.put(key, cached)
+    return cached[1]
+
+# every search below works on cell ids (y*width + x) and returns (solution path, path cost, nodes expanded)
+# the solution path is an empty list when the destination can't be reached
+
+# the steps below are shared with the streaming versions of the searches in streaming.py
+
+# the search state and frontier a search starts from, with the source visited
+# with a probe, the world, state and frontier are wrapped so every call on them is counted (see instrument.py)
+def start_search(world, source, frontier, probe=None):
+    state = SearchState(world.size)
+    state.visit(source)
+    if probe is not None:
+        world, state, frontier = probe.wrap(world, state, frontier)
+    return world, state, frontier
+
+# visits and pushes the children of 'node' that weren't reached yet
+# returns True as soon as 'stop_at' is generated, without pushing it
+def push_unvisited(world, state, frontier, node, stop_at=-1):
+    for child in world.neighbors(node):
+        # cycle check, each child is marked as visited as soon as it is generated
+        if state.visited[child]:
+            continue
+        state.visit(child, node)
+        if child == stop_at:
+            return True
+        frontier.push(child)
     return False
 
-# actions for each searching algorithm
-# set a_star=True when using A* algorithm
-def search_actions(point, dest, enc_vertices, explored, a_star, turf_vertices):
-    children = []
-    
-    # need new location by adding displacement for each direction
-    for dx, dy in point.directions:
-        child_x = dx + point.x
-        child_y = dy + point.y
-        child_node = Point(child_x, child_y)
-
-        if is_enclosed(child_node, enc_vertices) or child_node in explored:  #skip the actions already done
+# same as push_unvisited, on a priority queue ordered by h(child)
+def push_unvisited_by(world, state, frontier, node, h):
+    for child in world.neighbors(node):
+        if state.visited[child]:
             continue
-        
-        # this line requires all algorithms to enter turf_vertices whether or not they need path cost
-        # the solution was to add a seperate check on the path cost calculation so that if we need path cost with turfs, it will always exist
-        if is_enclosed(child_node, turf_vertices):
-            child_node.inside = True
-
-        if a_star:
-            # h(n) is straight line distance
-            hn = distance(child_node, dest)
-            # g(n) is path cost from the source to the point
-            trash, gn = reconstruct_solution_path(point, True)
-
-            child_node.parent = point
-            child_node.heuristic = hn + gn
-        else: 
-            # everything will use SLD 
-            child_node.parent = point
-            child_node.heuristic = distance(child_node, dest)
-
-        children.append(child_node)
-
-    return children
-
-# breadth first search implementation taking a source point, destination point, and the enclosed polygons
-def breadth_first_search(source, dest, enc_vertices, turf_vertices):
-    key = "BFS"
-    method_counters[key] += 1
-    nodes_expanded = 0
-    node = source
-    node.heuristic = distance(source, dest)
-
-    # return here
-    if source.__eq__(dest):
-        print_to_summary(key, 0, nodes_expanded)
-        SOLUTION, path_cost = reconstruct_solution_path(node)
-        return SOLUTION, path_cost
-
-    frontier = Queue()
-    explored = [] # i couldn't use a set bc Point isn't iterable
-    frontier.push(node) 
-
-    while True:
-        if frontier.isEmpty():
-            #failure
-            return SOLUTION, key
-        
-        node = frontier.pop()
-        nodes_expanded += 1
+        state.visit(child, node)
+        frontier.push(child, h(child))
+
+# relaxes the children of an A* node that was just closed
+# g(n) is carried forward in the search state, each step adds the cost of the cell it moves onto (turf 1.5, open 1.0)
+def relax_children(world, state, frontier, node, h):
+    gn = state.g[node]
+    for child in world.neighbors(node):
+        if state.closed[child]:
+            continue
+        g_child = gn + world.step_cost(child)
+        # relax the child only if this is the first or a cheaper way to reach it
+        if state.visited[child] and g_child >= state.g[child]:
+            continue
+        state.visit(child, node, g_child)
+        frontier.update(child, g_child + h(child))
 
-        actions = search_actions(node, dest, enc_vertices, explored, False, turf_vertices)
-        node.set_children(actions)
-        explored.append(node)
-
-        for child in node.children:
-            if child not in explored or child not in frontier:
-                if child.__eq__(dest):
-                    SOLUTION, path_cost = reconstruct_solution_path(child, False)
-                    print_to_summary(key, path_cost, nodes_expanded)
-                    return SOLUTION, key
-                frontier.push(child)
-            # each child should also be marked as visited
-            explored.append(child)
-
-# depth first search implementation taking a source point, destination point, and the enclosed polygons
-def depth_first_search(source, dest, enc_vertices, turf_vertices):
-    key = "DFS"
-    method_counters[key] += 1
-    nodes_expanded = 0
-    node = source
-    node.heuristic = distance(source, dest)
-
-    # return here
-    if source.__eq__(dest):
-        print_to_summary(key, 0, nodes_expanded)
-        SOLUTION, path_cost = reconstruct_solution_path(node)
-        return SOLUTION, path_cost
-
-    frontier = Stack()
-    explored = [] # i couldn't use a set bc Point isn't iterable
-    frontier.push(node) 
-
-    while True:
-        if frontier.isEmpty():
-            #failure
-            return SOLUTION, key
-        
-        node = frontier.pop()
-        #print(f"{nodes_expanded}")
-        nodes_expanded += 1
+def straight_line_heuristic(world, dest):
+    return functools.partial(cell_distance, world, c2=dest)
 
-        actions = search_actions(node, dest, enc_vertices, explored, False, turf_vertices)
-        node.set_children(actions)
-        explored.append(node)
-
-        if node.__eq__(dest):
-            SOLUTION, path_cost = reconstruct_solution_path(node, False)
-            print_to_summary(key, path_cost, nodes_expanded)
-            return SOLUTION, key
-        
-        for child in node.children:
-            # cycle check
-            if child not in explored or child not in frontier:
-                frontier.push(child)
-                explored.append(child)
-                
-# Greedy Best-First Search implementation taking a source point, destination point, and the enclosed polygons
-def greedy_bfs_search(source, dest, enc_vertices, turf_vertices):
-    key = "GBFS"
-    method_counters[key] += 1
+# breadth first search on the compiled world, the destination is found as soon as it is generated
+def bfs(world, source, dest, probe=None):
     nodes_expanded = 0
-    node = source
-    node.heuristic = distance(source, dest)
+    world, state, frontier = start_search(world, source, FifoQueue(), probe)
 
-    # return here
-    if source.__eq__(dest):
-        print_to_summary(key, 0, nodes_expanded)
-        SOLUTION, path_cost = reconstruct_solution_path(node)
-        return SOLUTION, path_cost
+    if source == dest:
+        return [source], 0, nodes_expanded
 
-    frontier = PriorityQueue()
-    reached = [] # i couldn't use a set bc Point isn't iterable
-    frontier.push(node, node.heuristic)
-
-    while not frontier.isEmpty():        
+    frontier.push(source)
+    while not frontier.isEmpty():
         node = frontier.pop()
-        #print(f"{nodes_expanded}")
         nodes_expanded += 1
+        if push_unvisited(world, state, frontier, node, dest):
+            return reconstruct_solution_path(state, world, dest, False) + (nodes_expanded,)
 
-        if node.__eq__(dest):
-            SOLUTION, path_cost = reconstruct_solution_path(node, True)
-            print_to_summary(key, path_cost, nodes_expanded)
-            return SOLUTION, key
-        
-        actions = search_actions(node, dest, enc_vertices, reached, False, turf_vertices)
-        node.set_children(actions)
-        #explored.append(node)
-
-        for child in node.children:
-            if child not in reached or best_cost(child.heuristic, reached):
-                reached.append(child)
-                frontier.push(child, child.heuristic)
-    
-    return SOLUTION, key
+    return [], 0, nodes_expanded
 
-def a_star_search(source, dest, enc_vertices, turf_vertices):
-    key = "A*"
-    method_counters[key] += 1
+# depth first search on the compiled world
+def dfs(world, source, dest, probe=None):
     nodes_expanded = 0
-    node = source
-    node.heuristic = distance(source, dest) # path cost should be 0
+    world, state, frontier = start_search(world, source, Stack(), probe)
 
-    # return here
-    if source.__eq__(dest):
-        print_to_summary(key, 0, nodes_expanded)
-        SOLUTION, path_cost = reconstruct_solution_path(node)
-        return SOLUTION, path_cost
+    frontier.push(source)
+    while not frontier.isEmpty():
+        node = frontier.pop()
+        nodes_expanded += 1
+        if node == dest:
+            return reconstruct_solution_path(state, world, node, False) + (nodes_expanded,)
+        push_unvisited(world, state, frontier, node)
 
-    frontier = PriorityQueue()
-    reached = [] # i couldn't use a set bc Point isn't iterable
-    frontier.push(node, distance) # path cost so far is 0
+    return [], 0, nodes_expanded
+
+# Greedy Best-First Search on the compiled world, ordered by straight line distance only
+# 'heuristic' replaces the straight line with another estimate, a function of a cell id
+def gbfs(world, source, dest, probe=None, heuristic=None):
+    h = heuristic or straight_line_heuristic(world, dest)
+    nodes_expanded = 0
+    world, state, frontier = start_search(world, source, IndexedPriorityQueue(), probe)
 
-    while not frontier.isEmpty():        
+    frontier.push(source, h(source))
+    while not frontier.isEmpty():
         node = frontier.pop()
-        #print(f"{nodes_expanded}")
         nodes_expanded += 1
+        if node == dest:
+            return reconstruct_solution_path(state, world, node, True) + (nodes_expanded,)
+        push_unvisited_by(world, state, frontier, node, h)
 
-        if node.__eq__(dest):
-            SOLUTION, path_cost = reconstruct_solution_path(node, True)
-            print_to_summary(key, path_cost, nodes_expanded)
-            return SOLUTION, key
-        
-        actions = search_actions(node, dest, enc_vertices, reached, True, turf_vertices)
-        node.set_children(actions)
-        #explored.append(node)
+    return [], 0, nodes_expanded
 
-        for child in node.children:
-            if child not in reached or best_cost(child.heuristic, reached):
-                reached.append(child)
-                frontier.update(child, child.heuristic)
+# A* on the compiled world, f(n) = g(n) + h(n)
+# straight line distance never overestimates a 4-connected step of at least 1, so a closed cell is already optimal
+# a 'heuristic' given instead has to be consistent for that to hold, like the landmark bound
+def a_star(world, source, dest, probe=None, heuristic=None):
+    h = heuristic or straight_line_heuristic(world, dest)
+    nodes_expanded = 0
+    world, state, frontier = start_search(world, source, IndexedPriorityQueue(), probe)
 
-    return SOLUTION, key
+    frontier.push(source, h(source)) # path cost so far is 0
+    while not frontier.isEmpty():
+        node = frontier.pop()
+        state.closed[node] = 1
+        nodes_expanded += 1
+        if node == dest:
+            return reconstruct_solution_path(state, world, node, True) + (nodes_expanded,)
+        relax_children(world, state, frontier, node, h)
+
+    return [], 0, nodes_expanded
+
+# A* and GBFS guided by the landmark bound instead of the straight line, see landmarks.py
+# the landmark tables are built (or loaded from .cache/) on the first query of a world
+def alt_a_star(world, source, dest, probe=None):
+    return a_star(world, source, dest, probe, landmark_heuristic(world, source, dest))
+
+def alt_gbfs(world, source, dest, probe=None):
+    return gbfs(world, source, dest, probe, landmark_heuristic(world, source, dest))
+
+# runs one of the searches above for the menu, through the path cache, and writes its summary
+# with a baseline (key, engine) the summary also compares nodes expanded and time against that search on the same query
+# 'notes' can be filled in by the engine while it runs, they are written after the other summary lines
+# with cached=False the path cache is neither asked nor filled, for answers that depend on timing
+# returns the solution as Points so it can be plotted
+def run_search(key, engine, source, dest, world, baseline=None, notes=(), cached=True):
+    method_counters[key] += 1
+    source_cell, dest_cell = world.cell_id(source.x, source.y), world.cell_id(dest.x, dest.y)
+    if instrument.sinks and engine in PROBED_ENGINES:
+        engine = functools.partial(instrument.run_probed, key, engine)
+    start = time.perf_counter()
+    if cached:
+        SOLUTION, path_cost, nodes_expanded = path_cache.search(world, key, engine, source_cell, dest_cell)
+    else:
+        SOLUTION, path_cost, nodes_expanded = engine(world, source_cell, dest_cell)
+    seconds = time.perf_counter() - start
+    if SOLUTION:
+        extra_notes, notes = notes, []
+        if cached and path_cache.last_lookup != "miss":
+            notes.append("Answered from the path cache")
+        # a cached answer expanded nothing, there is no search to compare
+        elif baseline is not None:
+            baseline_key, baseline_engine = baseline
+            start = time.perf_counter()
+            baseline_expanded = baseline_engine(world, source_cell, dest_cell)[2]
+            baseline_seconds = time.perf_counter() - start
+            reduction = 100 * (1 - nodes_expanded / max(baseline_expanded, 1))
+            # fewer nodes isn't always less time, a node can cost more to expand
+            notes.append(f"{baseline_key} nodes expanded: {baseline_expanded} ({reduction:.1f}% fewer), "
+                         f"took {baseline_seconds * 1000:.1f} ms against {seconds * 1000:.1f} ms")
+        print_to_summary(key, path_cost, nodes_expanded, notes + list(extra_notes))
+    return [Point(*world.cell_xy(cell)) for cell in SOLUTION], key
+
+def breadth_first_search(source, dest, world):
+    return run_search("BFS", bfs, source, dest, world)
+
+def depth_first_search(source, dest, world):
+    return run_search("DFS", dfs, source, dest, world)
+
+# the menu's GBFS and A* use the landmark bound, their summaries compare against the straight line
+# they run under their own names so the path cache never hands their paths to the straight line searches
+def greedy_bfs_search(source, dest, world):
+    return run_search("ALT-GBFS", alt_gbfs, source, dest, world, baseline=("Straight line GBFS", gbfs))
+
+def a_star_search(source, dest, world):
+    return run_search("ALT", alt_a_star, source, dest, world, baseline=("Straight line A*", a_star))
+
+def jump_point_search_menu(source, dest, world):
+    return run_search("JPS", jump_point_search, source, dest, world, baseline=("A*", a_star))
+
+def wavefront_bfs_search(source, dest, world):
+    return run_search("WAVE", wavefront_bfs, source, dest, world)
+
+# seconds the menu gives the anytime search
+ANYTIME_BUDGET = 0.05
+
+# seconds each search gets in Run All, and the colors Run All draws them in
+RUN_ALL_TIMEOUT = 30
+RUN_ALL_COLORS = {"BFS": "red", "DFS": "blue", "GBFS": "magenta", "A*": "orange"}
+
+# the summary lists every improvement the anytime search found within the budget
+# what it finds in time depends on the machine and may not be optimal, so it skips the path cache and every run
+# searches again instead of replaying the first answer
+def anytime_search_menu(source, dest, world, budget=ANYTIME_BUDGET):
+    improvements = []
+    def note(solution):
+        improvements.append(f"Improved after {solution.seconds * 1000:.1f} ms: {solution}")
+    engine = functools.partial(anytime_search, budget=budget, on_improve=note)
+    return run_search("ARA*", engine, source, dest, world, notes=improvements, cached=False)
+
+# the searches by menu name, for callers that pick an algorithm by name
+# FIELD answers from a cached cost-to-go field per destination, for many sources sharing one destination
+# ARA* called by name has no time budget, so it keeps improving its path until it is optimal
+# ALT and ALT-GBFS are A* and GBFS with the landmark bound
+ALGORITHMS = {"BFS": bfs, "DFS": dfs, "GBFS": gbfs, "A*": a_star, "JPS": jump_point_search,
+              "BiBFS": bidirectional_bfs, "HPA*": hpa_search, "FIELD": field_search,
+              "WAVE": wavefront_bfs, "ARA*": anytime_search, "ALT": alt_a_star, "ALT-GBFS": alt_gbfs}
+# the searches that take a probe, see instrument.py
+PROBED_ENGINES = {bfs, dfs, gbfs, a_star, alt_a_star, alt_gbfs}
+# the searches that take a time budget in seconds
+BUDGETED = {"ARA*"}
+
+def check_budget(algorithm, budget):
+    if budget is None:
+        return
+    if algorithm not in BUDGETED:
+        raise ValueError(f"a budget only applies to {', '.join(sorted(BUDGETED))}, not {algorithm}")
+    if not isinstance(budget, (int, float)) or budget < 0:
+        raise ValueError(f"the budget must be a number of seconds, got {budget!r}")
+
+# runs the search called 'algorithm' between two cell ids through the path cache, for the batch API and the service
+# with a 'budget' ARA* returns the best path found by then, which depends on timing, so it bypasses the cache
+def route_cells(world, algorithm, source, dest, budget=None):
+    if budget is None:
+        return path_cache.search(world, algorithm, ALGORITHMS[algorithm], source, dest)
+    return anytime_search(world, source, dest, budget=budget)
+
+def polygons_to_tuples(polygons):
+    return [[p.to_tuple() for p in polygon] for polygon in polygons]
+
+# reads an enclosure file and a turf file and compiles them into a world
+def read_world_files(enc_path, turf_path):
+    width, height = read_world_size(enc_path)
+    enc_polygons = polygons_to_tuples(gen_polygons(enc_path))
+    turf_polygons = polygons_to_tuples(gen_polygons(turf_path))
+    return compile_world(enc_polygons, turf_polygons, width, height)
+
+# reads an enclosure file and a turf file, compiles them into a world and writes it to out_path
+def compile_world_files(enc_path, turf_path, out_path):
+    world = read_world_files(enc_path, turf_path)
+    save_world(world, out_path)
+    return world
+
+# the world for an enclosure file and a turf file, or for a compiled .npz (see compile_world_files) given alone
+# the compiled world is cached next to the files, keyed by their contents, so only the first load parses and rasterizes
+def load_world(enc_path, turf_path=None):
+    if turf_path is None:
+        return load_compiled_file(enc_path)
+    files = (enc_path, turf_path)
+    digest = file_digest(files)
+    compiled_path = os.path.join(cache_dir(files), f"world-{digest}.npz")
+    world = None
+    if os.path.exists(compiled_path):
+        world = load_compiled_world(compiled_path)
+    if world is None:
+        world = read_world_files(enc_path, turf_path)
+        try:
+            save_world(world, compiled_path)
+        except OSError:
+            # the cache only saves the next load some work, a directory that can't be written just goes without it
+            pass
+    # remembered so preprocessing caches can be keyed by and stored next to the files
+    world.files = files
+    world.digest = digest
+    return world
+
+def load_compiled_file(path):
+    if not path.endswith(".npz"):
+        raise ValueError(f"{path} isn't a compiled world, a world from polygon files needs its enclosure and turf files")
+    world = load_compiled_world(path)
+    if world is None:
+        raise ValueError(f"{path} was compiled in an older format, compile it again")
+    world.files = (path,)
+    world.digest = file_digest(world.files)
+    return world
 
 if __name__ == "__main__":
+    from render import show_path
+    from portfolio import run_portfolio, found_path
+
     epolygons = gen_polygons('TestingGrid/world1_enclosures.txt')
     tpolygons = gen_polygons('TestingGrid/world1_turfs.txt')
+    width, height = read_world_size('TestingGrid/world1_enclosures.txt')
 
     #source = Point(24,17)
     #dest = Point(28,20)
@@ -286,39 +380,17 @@ if __name__ == "__main__":
     # source = Point(12,47)
     # dest = Point(40,3)
 
-    enc_polygons = []
-    turf_polygons = []
-
     fig, ax = draw_board()
-    draw_grids(ax)
+    draw_grids(ax, width, height)
     draw_source(ax, source.x, source.y)  # source point
     draw_dest(ax, dest.x, dest.y)  # destination point
     
-    # Draw enclosure polygons
-    for polygon in epolygons:
-        #cleared to make every individual shape
-        shape = []
-        for p in polygon:
-            draw_point(ax, p.x, p.y)
-            shape.append((p.x, p.y))
-        enc_polygons.append(shape)
-
-    for polygon in epolygons:
-        for i in range(0, len(polygon)):
-            draw_line(ax, [polygon[i].x, polygon[(i+1)%len(polygon)].x], [polygon[i].y, polygon[(i+1)%len(polygon)].y])
-    
-    # Draw turf polygons
-    for polygon in tpolygons:
-        #cleared to make every individual shape
-        shape = []
-        for p in polygon:
-            draw_green_point(ax, p.x, p.y)
-            shape.append((p.x, p.y))
-        turf_polygons.append(shape)
-
-    for polygon in tpolygons:
-        for i in range(0, len(polygon)):
-            draw_green_line(ax, [polygon[i].x, polygon[(i+1)%len(polygon)].x], [polygon[i].y, polygon[(i+1)%len(polygon)].y])
+    # each polygon set is drawn as one outline artist and one vertex artist
+    draw_polygons(ax, polygons_to_tuples(epolygons), 'k')
+    draw_polygons(ax, polygons_to_tuples(tpolygons), 'g')
+
+    # the polygons are rasterized once (and cached) so the searches never touch shapely
+    world = load_world('TestingGrid/world1_enclosures.txt', 'TestingGrid/world1_turfs.txt')
 
     #### Here call your search to compute and collect res_path
     
@@ -332,22 +404,35 @@ if __name__ == "__main__":
     #         draw_result_white(ax, [res_path[i].x, res_path[i+1].x], [res_path[i].y, res_path[i+1].y])
     #         clear_result_line(ax, [res_path[i].x, res_path[i+1].x], [res_path[i].y, res_path[i+1].y])
             
+    # the path is one line, animated in at most render.MAX_FRAMES blitted frames
     def show_plot(res_path, color, alpha):
-        lines = []
-        for i in range(len(res_path)-1):
-            line = draw_result_line(ax, [res_path[i].x, res_path[i+1].x], [res_path[i].y, res_path[i+1].y], color, alpha)
-            lines.append(line)
-            plt.pause(0.0001)
-        return lines
+        return [show_path(fig, ax, [p.to_tuple() for p in res_path], color, alpha)]
     
     def clear_plot(lines):
         for line in lines:
-            line[0].remove()
+            line.remove()
         lines.clear()
-
-    def reset_everything(source, dest):
-        reset_node(source, dest)
-        reset_grid()
+        fig.canvas.draw_idle()
+
+    # runs BFS, DFS, GBFS and A* side by side in worker processes, each with RUN_ALL_TIMEOUT seconds
+    # the summaries and paths are written here afterwards, in menu order, so the searches never share anything
+    # with 'accept' the first result it accepts wins and the searches still running are cancelled
+    def run_all(accept=None):
+        results = run_portfolio(world, world.cell_id(source.x, source.y), world.cell_id(dest.x, dest.y),
+                                timeout=RUN_ALL_TIMEOUT, accept=accept)
+        lines = []
+        for result in results:
+            key = result["algorithm"]
+            if result["status"] != "done":
+                print(f"{key}: {result['status']} after {result['seconds']:.2f}s")
+                continue
+            method_counters[key] += 1
+            if result["path"]:
+                notes = ["First acceptable answer, the other searches were cancelled"] if result.get("winner") else []
+                print_to_summary(key, result["path_cost"], result["nodes_expanded"], notes)
+                lines += show_plot([Point(*world.cell_xy(cell)) for cell in result["path"]], RUN_ALL_COLORS[key], 0.5)
+            print(f"Ran: {key}, Number of times: {method_counters[key]}")
+        return lines
 
     #add more menu here!
     menu = ["1. Breadth First Search (red line)", 
@@ -355,6 +440,10 @@ if __name__ == "__main__":
             "3. Greedy Best-First Search (magenta line)",
             "4. A* Search (orange)",
             "5. Run All",
+            "6. Jump Point Search (cyan)",
+            "7. Wavefront Breadth First Search (brown)",
+            "8. Anytime A* within 50 ms (olive)",
+            "9. Run All, first path found wins",
             "0. Quit"
             ]
 
@@ -368,46 +457,44 @@ if __name__ == "__main__":
             res_path = [Point(0, 0)]
             match user_input:
                 case 1:
-                    res_path, key = breadth_first_search(source, dest, enc_polygons, turf_polygons)
+                    res_path, key = breadth_first_search(source, dest, world)
                     if res_path:
                         line = show_plot(res_path, "red", 0.5)
                         print(f"Ran: {key}, Number of times: {method_counters[key]}")
                 case 2:
-                    res_path, key = depth_first_search(source, dest, enc_polygons, turf_polygons)
+                    res_path, key = depth_first_search(source, dest, world)
                     if res_path:
                         line = show_plot(res_path, "blue", 0.5)
                         print(f"Ran: {key}, Number of times: {method_counters[key]}")
                 case 3:
-                    res_path, key = greedy_bfs_search(source, dest, enc_polygons, turf_polygons)
+                    res_path, key = greedy_bfs_search(source, dest, world)
                     if res_path:
                         line = show_plot(res_path, "magenta", 0.5)
                         print(f"Ran: {key}, Number of times: {method_counters[key]}")
                 case 4:
-                    res_path, key = a_star_search(source, dest, enc_polygons, turf_polygons)
+                    res_path, key = a_star_search(source, dest, world)
                     if res_path:
                         line = show_plot(res_path, "orange", 0.5)
                         print(f"Ran: {key}, Number of times: {method_counters[key]}")
                 case 5:
+                    line = run_all()
+                case 9:
+                    line = run_all(accept=found_path)
+                case 6:
+                    res_path, key = jump_point_search_menu(source, dest, world)
                     if res_path:
-                        res_path, key = breadth_first_search(source, dest, enc_polygons, turf_polygons)
-                        line = show_plot(res_path, "red", 0.5)
-                        print(f"Ran: {key}, Number of times: {method_counters[key]}")
-                        reset_everything(source, dest)
-
-                        res_path, key = depth_first_search(source, dest, enc_polygons, turf_polygons)
-                        line = show_plot(res_path, "blue", 0.5)
+                        line = show_plot(res_path, "cyan", 0.5)
                         print(f"Ran: {key}, Number of times: {method_counters[key]}")
-                        reset_everything(source, dest)
-
-                        res_path, key = greedy_bfs_search(source, dest, enc_polygons, turf_polygons)
-                        line = show_plot(res_path, "magenta", 0.5)
+                case 7:
+                    res_path, key = wavefront_bfs_search(source, dest, world)
+                    if res_path:
+                        line = show_plot(res_path, "brown", 0.5)
                         print(f"Ran: {key}, Number of times: {method_counters[key]}")
-                        reset_everything(source, dest)
-
-                        res_path, key = a_star_search(source, dest, enc_polygons, turf_polygons)
-                        line = show_plot(res_path, "orange", 0.5)
+                case 8:
+                    res_path, key = anytime_search_menu(source, dest, world)
+                    if res_path:
+                        line = show_plot(res_path, "olive", 0.5)
                         print(f"Ran: {key}, Number of times: {method_counters[key]}")
-                        reset_everything(source, dest)
                 case 0:
                     exit_flag = True
                     res_path = [Point(0, 0)]
@@ -417,7 +504,6 @@ if __name__ == "__main__":
                 clear_plot(line)
             if not res_path:
                 print(f"Failed to find the destination")
-            reset_everything(source, dest)
         except ValueError:
             print("Please enter a valid integer.\n")        
     
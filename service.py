@@ -0,0 +1,333 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import socket
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+
+from batch import share_world, attach_world
+from distance_field import field_cache
+from hpa import abstraction_cache
+from landmarks import landmark_cache
+from search import ALGORITHMS, check_budget, load_world, route_cells
+from world import file_digest
+
+# A long running search service
+#
+# Clients send one JSON object per line over TCP or a unix socket and get one JSON line back for each:
+#   {"id": 1, "op": "route", "enclosures": "...txt", "turfs": "...txt", "algorithm": "A*", "source": [8, 10], "dest": [43, 45]}
+#   -> {"id": 1, "ok": true, "result": {"path": [[8, 10], ...], "path_cost": 85.5, "nodes_expanded": 1666, ...}}
+#   {"id": 2, "op": "load", "enclosures": "...txt", "turfs": "...txt"}      compile or load a world ahead of its queries
+#   {"id": 3, "op": "stats"}                                                 latency percentiles, queue depth and counters
+# A world compiled with "python cli.py compile" can be given as {"world": "...npz"} instead of the two polygon files.
+# A route can add "budget": seconds for ARA*, which answers with the best path found by then, never from the cache.
+# A failed request gets {"id": ..., "ok": false, "error": "..."}. Replies on one connection come back as they finish,
+# so clients that pipeline requests should match them by id.
+#
+# Worlds stay loaded once used, with their masks in shared memory that the worker processes attach to, so a query
+# costs only the search. Identical queries that arrive while one is already running wait for that one instead of
+# searching again.
+
+HOST = "127.0.0.1"
+PORT = 8765
+# latencies kept for the percentiles
+LATENCY_WINDOW = 10000
+PERCENTILES = [50, 90, 99]
+
+# in each worker: attached worlds by shared memory name
+_worlds = {}
+# in each worker: blocks of released worlds that couldn't be closed yet because something still holds their world,
+# closing them is tried again on every call
+_detached = []
+
+# unmaps the worlds the service has released, an unlinked block is only freed once every process has closed it
+# the tables built on a released world hold on to it, so they go too
+def detach_released(live):
+    for name in [name for name in _worlds if name not in live]:
+        shm, world = _worlds.pop(name)
+        for cache in (field_cache, abstraction_cache, landmark_cache):
+            for key in [key for key, table in cache.entries.items() if table.world is world]:
+                cache.discard(key)
+        _detached.append(shm)
+    for shm in list(_detached):
+        try:
+            shm.close()
+        except BufferError:
+            continue
+        _detached.remove(shm)
+
+# 'digest' is the file_digest the world was built from, preprocessing is cached under it
+# 'live' names the shared memory of every world the service hasn't released
+def solve_shared(shm_name, width, height, files, digest, algorithm, source, dest, budget=None, live=()):
+    detach_released(live)
+    entry = _worlds.get(shm_name)
+    if entry is None:
+        from multiprocessing import shared_memory
+        shm = shared_memory.SharedMemory(name=shm_name)
+        world = attach_world(shm, width, height)
+        world.files = files
+        world.digest = digest
+        entry = _worlds[shm_name] = (shm, world)
+    world = entry[1]
+    path, path_cost, nodes_expanded = route_cells(world, algorithm, world.cell_id(*source), world.cell_id(*dest), budget)
+    return {
+        "path": [world.cell_xy(cell) for cell in path],
+        "path_cost": path_cost,
+        "nodes_expanded": nodes_expanded,
+    }
+
+def percentile(ordered, p):
+    "Nearest-rank percentile of a sorted list"
+    if not ordered:
+        return None
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+class LoadedWorld:
+    "A world kept in shared memory for the workers"
+    def __init__(self, world, files):
+        self.world = world
+        self.files = files
+        self.shm = share_world(world)
+        # searches submitted for this world and not finished, it is released only once they are done
+        self.running = set()
+        self.released = False
+
+    async def release(self):
+        # a search can still be submitted by a request that got this world just before it was retired
+        while self.running:
+            await asyncio.gather(*self.running, return_exceptions=True)
+        # from here on the workers are told to let go of it
+        self.released = True
+        self.shm.close()
+        self.shm.unlink()
+
+class SearchService:
+    def __init__(self, workers=None):
+        self.pool = ProcessPoolExecutor(workers)
+        # start the workers now, forked before any world is shared, so they don't inherit mappings they can't release
+        # they share this process's resource tracker, which leaves unlinking the worlds to the service
+        resource_tracker.ensure_running()
+        self.pool.submit(int).result()
+        # (world files..., digest of their contents) -> task loading the world, so concurrent first queries load it once
+        # and an edit to the files loads them again
+        # the files are an enclosure path and a turf path, or the path of a compiled world
+        self.worlds = {}
+        # world files -> ((mtime, size) of each, digest), so the files are only read again when they change
+        self.digests = {}
+        # tasks of worlds replaced by newer contents of their files, until their last searches finish
+        self.retired = set()
+        # (world files, digest, algorithm, source, dest) -> task of the search running for it
+        self.in_flight = {}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.searches = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.started = time.monotonic()
+
+    def digest_of(self, files):
+        "file_digest of the files, only read again when their modification time or size changed"
+        stamp = tuple((stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, files))
+        known = self.digests.get(files)
+        if known is None or known[0] != stamp:
+            known = self.digests[files] = (stamp, file_digest(files))
+        return known[1]
+
+    # the world a request names, by its polygon files or a compiled .npz
+    async def world_for(self, message):
+        paths = [message["world"]] if "world" in message else [message["enclosures"], message["turfs"]]
+        files = tuple(os.path.abspath(path) for path in paths)
+        loop = asyncio.get_running_loop()
+        key = files + (await loop.run_in_executor(None, self.digest_of, files),)
+        task = self.worlds.get(key)
+        if task is None:
+            # the files changed since their world was loaded, it is let go once its searches finish
+            for old_key in [old_key for old_key in self.worlds if old_key[:-1] == files]:
+                self.retire(self.worlds.pop(old_key))
+            # compiling a world can take a while, it runs in a thread so other queries keep going
+            task = self.worlds[key] = asyncio.ensure_future(
+                loop.run_in_executor(None, lambda: LoadedWorld(load_world(*files), files)))
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            # let a later request try again, the file may have been fixed
+            if self.worlds.get(key) is task:
+                del self.worlds[key]
+            raise
+
+    def live_names(self):
+        "Shared memory names of the loaded worlds not released yet, live or retired"
+        names = []
+        for task in list(self.worlds.values()) + list(self.retired):
+            if task.done() and not task.cancelled() and task.exception() is None and not task.result().released:
+                names.append(task.result().shm.name)
+        return frozenset(names)
+
+    def retire(self, task):
+        async def release():
+            try:
+                loaded = await task
+                await loaded.release()
+            except Exception:
+                pass
+            finally:
+                # until here close() releases it instead
+                self.retired.discard(task)
+        self.retired.add(task)
+        asyncio.ensure_future(release())
+
+    async def route(self, message):
+        algorithm = message.get("algorithm", "A*")
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {', '.join(ALGORITHMS)}")
+        budget = message.get("budget")
+        check_budget(algorithm, budget)
+        loaded = await self.world_for(message)
+        world = loaded.world
+        source, dest = tuple(message["source"]), tuple(message["dest"])
+        for x, y in (source, dest):
+            if not (0 <= x < world.width and 0 <= y < world.height):
+                raise ValueError(f"({x}, {y}) is outside the {world.width}x{world.height} world")
+
+        # the digest the world was built from, which is what its searches and tables describe
+        key = (loaded.files, world.digest, algorithm, source, dest, budget)
+        task = self.in_flight.get(key)
+        if task is None:
+            self.searches += 1
+            loop = asyncio.get_running_loop()
+            task = self.in_flight[key] = asyncio.ensure_future(loop.run_in_executor(
+                self.pool, solve_shared, loaded.shm.name, world.width, world.height, loaded.files, world.digest,
+                algorithm, source, dest, budget, self.live_names()))
+            loaded.running.add(task)
+            task.add_done_callback(lambda done: self.in_flight.pop(key, None))
+            task.add_done_callback(loaded.running.discard)
+        else:
+            self.coalesced += 1
+        # shielded so one client going away doesn't cancel the search for the others waiting on it
+        result = await asyncio.shield(task)
+        return {"algorithm": algorithm, "source": source, "dest": dest, **result}
+
+    async def load(self, message):
+        world = (await self.world_for(message)).world
+        return {"width": world.width, "height": world.height}
+
+    def stats(self, message=None):
+        ordered = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "searches": self.searches,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            # distinct searches submitted to the workers and not finished yet
+            "queue_depth": len(self.in_flight),
+            "worlds": len(self.worlds),
+            "uptime_seconds": time.monotonic() - self.started,
+            "latency_ms": {f"p{p}": percentile(ordered, p) for p in PERCENTILES} | {"max": ordered[-1] if ordered else None},
+        }
+
+    async def handle(self, message):
+        start = time.perf_counter()
+        self.requests += 1
+        op = message.get("op", "route")
+        try:
+            if op == "route":
+                result = await self.route(message)
+            elif op == "load":
+                result = await self.load(message)
+            elif op == "stats":
+                result = self.stats(message)
+            else:
+                raise ValueError(f"unknown op {op!r}")
+            reply = {"id": message.get("id"), "ok": True, "result": result}
+        except Exception as e:
+            self.errors += 1
+            reply = {"id": message.get("id"), "ok": False, "error": f"{type(e).__name__}: {e}"}
+        if op == "route":
+            self.latencies.append((time.perf_counter() - start) * 1000)
+        return reply
+
+    async def serve_connection(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(message):
+            reply = await self.handle(message)
+            async with lock:
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError("expected a JSON object")
+                except ValueError as e:
+                    self.errors += 1
+                    async with lock:
+                        writer.write((json.dumps({"id": None, "ok": False, "error": f"bad request: {e}"}) + "\n").encode())
+                    continue
+                # each request runs on its own, so a slow search doesn't hold up the rest of the connection
+                task = asyncio.ensure_future(answer(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        for task in list(self.worlds.values()) + list(self.retired):
+            if task.done() and not task.exception() and not task.result().released:
+                loaded = task.result()
+                loaded.shm.close()
+                loaded.shm.unlink()
+
+async def serve(host=HOST, port=PORT, unix_path=None, workers=None):
+    service = SearchService(workers)
+    if unix_path is not None:
+        server = await asyncio.start_unix_server(service.serve_connection, unix_path)
+    else:
+        server = await asyncio.start_server(service.serve_connection, host, port)
+    try:
+        # stop cleanly on a plain kill too, so the shared memory is released
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+# a blocking client for scripts: sends one message and returns the reply
+def request(message, host=HOST, port=PORT, unix_path=None):
+    if unix_path is not None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(unix_path)
+    else:
+        sock = socket.create_connection((host, port))
+    with sock, sock.makefile("rw") as f:
+        f.write(json.dumps(message) + "\n")
+        f.flush()
+        return json.loads(f.readline())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve path queries over a socket with worlds kept in memory.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, help="search processes (all cores by default)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
@@ -0,0 +1,245 @@
+import time
+
+import numpy as np
+
+from anytime import Solution, ara_star
+from bidirectional import expand_layer_node, start_sides, splice, trivial_result
+from events import Expanded, ExpandedLayer, Finished
+from jps import JumpGrid, jump_point_path, relax_jump_points
+from landmarks import landmark_heuristic
+from search import (ALGORITHMS, push_unvisited, push_unvisited_by, reconstruct_solution_path, relax_children,
+                    start_search, straight_line_heuristic)
+from utils import FifoQueue, IndexedPriorityQueue, SearchState, Stack
+from wavefront import next_layer, start_wavefront, trace
+from world import cell_distance
+
+# Streaming searches
+#
+# Each search below is a generator that yields an event as it works instead of only returning at the end (the event
+# classes are in events.py): an Expanded for every node taken off the frontier (every jump point for JPS, both sides
+# for bidirectional BFS), an ExpandedLayer for every layer of the wavefront, a Solution (see anytime.py) for every improved path of ARA*, and always a Finished last, with the same
+# (path, path cost, nodes expanded) the searches in search.py return. Events are made one at a time as the caller asks
+# for them, so nothing is buffered, and a caller that stops iterating stops the search there.
+#
+# Each stream runs the same step helpers as the plain search it mirrors and only adds the yields around them, so the
+# plain searches stay free of events and callers that only want the final path pay nothing for them.
+
+# the loops below take the same steps as their counterparts in search.py, jps.py, bidirectional.py, wavefront.py and
+# anytime.py, through the same helpers, and yield between them
+
+def stream_bfs(world, source, dest, probe=None):
+    nodes_expanded = 0
+    world, state, frontier = start_search(world, source, FifoQueue(), probe)
+
+    if source == dest:
+        yield Finished([source], 0, nodes_expanded)
+        return
+
+    frontier.push(source)
+    while not frontier.isEmpty():
+        size = len(frontier)
+        node = frontier.pop()
+        nodes_expanded += 1
+        found = push_unvisited(world, state, frontier, node, dest)
+        yield Expanded(node, None, len(frontier) - size, len(frontier))
+        if found:
+            yield Finished(*reconstruct_solution_path(state, world, dest, False), nodes_expanded)
+            return
+
+    yield Finished([], 0, nodes_expanded)
+
+def stream_dfs(world, source, dest, probe=None):
+    nodes_expanded = 0
+    world, state, frontier = start_search(world, source, Stack(), probe)
+
+    frontier.push(source)
+    while not frontier.isEmpty():
+        size = len(frontier)
+        node = frontier.pop()
+        nodes_expanded += 1
+        if node == dest:
+            yield Expanded(node, None, -1, size - 1)
+            yield Finished(*reconstruct_solution_path(state, world, node, False), nodes_expanded)
+            return
+        push_unvisited(world, state, frontier, node)
+        yield Expanded(node, None, len(frontier) - size, len(frontier))
+
+    yield Finished([], 0, nodes_expanded)
+
+# 'heuristic' works as for gbfs and a_star in search.py
+def stream_gbfs(world, source, dest, probe=None, heuristic=None):
+    h = heuristic or straight_line_heuristic(world, dest)
+    nodes_expanded = 0
+    world, state, frontier = start_search(world, source, IndexedPriorityQueue(), probe)
+
+    frontier.push(source, h(source))
+    while not frontier.isEmpty():
+        size = len(frontier)
+        node = frontier.pop()
+        nodes_expanded += 1
+        if node == dest:
+            yield Expanded(node, None, -1, size - 1)
+            yield Finished(*reconstruct_solution_path(state, world, node, True), nodes_expanded)
+            return
+        push_unvisited_by(world, state, frontier, node, h)
+        yield Expanded(node, None, len(frontier) - size, len(frontier))
+
+    yield Finished([], 0, nodes_expanded)
+
+def stream_a_star(world, source, dest, probe=None, heuristic=None):
+    h = heuristic or straight_line_heuristic(world, dest)
+    nodes_expanded = 0
+    world, state, frontier = start_search(world, source, IndexedPriorityQueue(), probe)
+
+    frontier.push(source, h(source))
+    while not frontier.isEmpty():
+        size = len(frontier)
+        node = frontier.pop()
+        state.closed[node] = 1
+        nodes_expanded += 1
+        if node == dest:
+            yield Expanded(node, state.g[node], -1, size - 1)
+            yield Finished(*reconstruct_solution_path(state, world, node, True), nodes_expanded)
+            return
+        relax_children(world, state, frontier, node, h)
+        yield Expanded(node, state.g[node], len(frontier) - size, len(frontier))
+
+    yield Finished([], 0, nodes_expanded)
+
+# one Expanded per jump point
+def stream_jump_point_search(world, source, dest):
+    nodes_expanded = 0
+    grid = JumpGrid(world, dest)
+    state = SearchState(world.size)
+    state.visit(source)
+
+    frontier = IndexedPriorityQueue()
+    frontier.push(source, cell_distance(world, source, dest))
+    while not frontier.isEmpty():
+        size = len(frontier)
+        node = frontier.pop()
+        state.closed[node] = 1
+        nodes_expanded += 1
+        if node == dest:
+            yield Expanded(node, state.g[node], -1, size - 1)
+            yield Finished(jump_point_path(world, state, source, node), state.g[node], nodes_expanded)
+            return
+        relax_jump_points(world, grid, state, frontier, node, dest)
+        yield Expanded(node, state.g[node], len(frontier) - size, len(frontier))
+
+    yield Finished([], 0, nodes_expanded)
+
+# one ExpandedLayer per wavefront layer
+def stream_wavefront_bfs(world, source, dest):
+    blocked_bits = np.asarray(world.blocked_bits)
+    came_from = start_wavefront(world, source)
+    nodes_expanded = 0
+
+    if source == dest:
+        yield Finished([source], 0, nodes_expanded)
+        return
+
+    frontier = np.array([source], dtype=np.int64)
+    while len(frontier):
+        nodes_expanded += len(frontier)
+        layer = next_layer(world, blocked_bits, came_from, frontier)
+        yield ExpandedLayer(frontier, len(layer) - len(frontier), len(layer))
+        if came_from[dest]:
+            path = trace(world, came_from, dest)
+            yield Finished(path, len(path) - 1, nodes_expanded)
+            return
+        frontier = layer
+
+    yield Finished([], 0, nodes_expanded)
+
+# one Expanded per node, with the side it was expanded from and g counted from that side's end
+# the frontier is every cell waiting on either side, the rest of the layer being grown included
+def stream_bidirectional_bfs(world, source, dest):
+    result = trivial_result(world, source, dest)
+    if result is not None:
+        yield Finished(*result)
+        return
+
+    nodes_expanded = 0
+    forward, backward = start_sides(world, source, dest)
+    forward_layer, backward_layer = [source], [dest]
+    while forward_layer and backward_layer:
+        grow_forward = len(forward_layer) <= len(backward_layer)
+        this, other = (forward, backward) if grow_forward else (backward, forward)
+        layer, other_layer = (forward_layer, backward_layer) if grow_forward else (backward_layer, forward_layer)
+        side = "forward" if grow_forward else "backward"
+
+        best = None
+        grown = []
+        for i, node in enumerate(layer):
+            nodes_expanded += 1
+            size = len(grown)
+            meeting = expand_layer_node(world, this, other, node, grown)
+            if meeting is not None and (best is None or meeting[0] < best[0]):
+                best = meeting
+            waiting = len(layer) - i - 1 + len(grown) + len(other_layer)
+            yield Expanded(node, this.g[node], len(grown) - size - 1, waiting, side)
+
+        if best is not None:
+            yield Finished(splice(forward, backward, best[1]), int(best[0]), nodes_expanded)
+            return
+        if grow_forward:
+            forward_layer = grown
+        else:
+            backward_layer = grown
+
+    yield Finished([], 0, nodes_expanded)
+
+def stream_alt_a_star(world, source, dest, probe=None):
+    yield from stream_a_star(world, source, dest, probe, landmark_heuristic(world, source, dest))
+
+def stream_alt_gbfs(world, source, dest, probe=None):
+    yield from stream_gbfs(world, source, dest, probe, landmark_heuristic(world, source, dest))
+
+# an Expanded for every node of every round, each improved Solution as ARA* finds it, then the best one as Finished
+# a node can be expanded again in a later round, when its cost improved after it was expanded
+# 'budget' is in seconds, with none it runs until the path is optimal
+def stream_ara_star(world, source, dest, budget=None):
+    if source == dest:
+        yield Finished([source], 0, 0)
+        return
+    deadline = None if budget is None else time.perf_counter() + budget
+    events = ara_star(world, source, dest, deadline, expansions=True)
+    best = None
+    while True:
+        try:
+            event = next(events)
+        except StopIteration as stop:
+            nodes_expanded = stop.value
+            break
+        if isinstance(event, Solution):
+            best = event
+        yield event
+    if best is None:
+        yield Finished([], 0, nodes_expanded)
+    else:
+        yield Finished(best.path, best.path_cost, nodes_expanded)
+
+# the streaming searches by the same names as search.ALGORITHMS
+STREAMS = {"BFS": stream_bfs, "DFS": stream_dfs, "GBFS": stream_gbfs, "A*": stream_a_star, "JPS": stream_jump_point_search,
+           "BiBFS": stream_bidirectional_bfs, "WAVE": stream_wavefront_bfs, "ARA*": stream_ara_star,
+           "ALT": stream_alt_a_star, "ALT-GBFS": stream_alt_gbfs}
+
+# a stream for any algorithm in search.ALGORITHMS
+# the ones without a streaming version run to the end and yield only their Finished
+def stream_search(algorithm, world, source, dest):
+    if algorithm in STREAMS:
+        return STREAMS[algorithm](world, source, dest)
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {', '.join(ALGORITHMS)}")
+    return finished_only(ALGORITHMS[algorithm], world, source, dest)
+
+def finished_only(engine, world, source, dest):
+    yield Finished(*engine(world, source, dest))
+
+# drains a stream and returns its (path, path cost, nodes expanded)
+def final_result(events):
+    for event in events:
+        if isinstance(event, Finished):
+            return event.result()
+    raise ValueError("the stream ended without a Finished event")
@@ -1,4 +1,7 @@
 import heapq
+import mmap
+import struct
+from collections import OrderedDict, deque
 
 class Stack:
     "A container with a last-in-first-out (LIFO) policy"
@@ -17,6 +20,9 @@ class Stack:
         "Returns true if the stack is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 class Queue:
     "A container with a first-in-first-out (FIFO) policy"
     def __init__(self):
@@ -76,3 +82,176 @@ class PriorityQueue:
                 break
         if flag == False:
             self.push(item, priority)
+
+
+class FifoQueue:
+    "A first-in-first-out (FIFO) container with O(1) push and pop"
+    def __init__(self):
+        self.list = deque()
+
+    def push(self,item):
+        "Enqueue the 'item' into the queue"
+        self.list.append(item)
+
+    def pop(self):
+        "Dequeue the earliest enqueued item still in the queue"
+        return self.list.popleft()
+
+    def isEmpty(self):
+        "Returns true if the queue is empty"
+        return len(self.list) == 0
+
+    def __len__(self):
+        return len(self.list)
+
+class IndexedPriorityQueue:
+    """
+      Same interface and tie-breaking as PriorityQueue, but update is
+      O(log n). Each item maps to its live heap entry; an update pushes a new
+      entry and the replaced one is skipped when it reaches the top (lazy
+      deletion). Items must be hashable.
+    """
+    def  __init__(self):
+        self.heap = []
+        self.entries = {}
+        self.count = 0
+
+    def push(self, item, priority):
+        entry = (priority, self.count, item)
+        heapq.heappush(self.heap, entry)
+        self.entries[item] = entry
+        self.count += 1
+
+    def pop(self):
+        while True:
+            entry = heapq.heappop(self.heap)
+            item = entry[2]
+            # only the entry the item currently maps to is live
+            if self.entries.get(item) is entry:
+                del self.entries[item]
+                return item
+
+    def isEmpty(self):
+        return len(self.entries) == 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def peek(self):
+        "Returns (priority, item) for the item pop would return, without removing it"
+        while True:
+            entry = self.heap[0]
+            if self.entries.get(entry[2]) is entry:
+                return entry[0], entry[2]
+            heapq.heappop(self.heap)
+
+    def update(self, item, priority):
+        # If item already in priority queue with higher priority, update its priority
+        # If item already in priority queue with equal or lower priority, do nothing
+        # If item not in priority queue, do the same thing as self.push
+        entry = self.entries.get(item)
+        if entry is None:
+            self.push(item, priority)
+        elif priority < entry[0]:
+            # keep the original count so ties still pop in insertion order
+            entry = (priority, entry[1], item)
+            heapq.heappush(self.heap, entry)
+            self.entries[item] = entry
+
+    def remove(self, item):
+        "Removes 'item' if it is queued, its heap entry is skipped when it reaches the top"
+        self.entries.pop(item, None)
+
+    def __contains__(self, item):
+        return item in self.entries
+
+
+class LRUCache:
+    """
+      A bounded mapping that evicts the least recently used entries, with
+      hit and miss counters. By default 'maxsize' is a number of entries;
+      with 'sizeof' (a function of a value) it bounds the total size of
+      the values instead, such as their bytes.
+    """
+    def __init__(self, maxsize, sizeof=None):
+        self.maxsize = maxsize
+        self.sizeof = sizeof
+        self.entries = OrderedDict()
+        # total size of the entries, their count without 'sizeof'
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        "Returns the entry for 'key' and marks it as recently used, or 'default' if there is none"
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        """
+          Stores 'value' under 'key', evicting least recently used entries
+          until it fits. The newest entry is always kept, even if it alone
+          is over 'maxsize'. Returns the evicted (key, value) pairs.
+        """
+        if key in self.entries:
+            self.size -= self.size_of(self.entries[key])
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        self.size += self.size_of(value)
+        evicted = []
+        while self.size > self.maxsize and len(self.entries) > 1:
+            evicted.append(self.entries.popitem(last=False))
+            self.size -= self.size_of(evicted[-1][1])
+        return evicted
+
+    def discard(self, key):
+        "Removes the entry for 'key' if there is one"
+        if key in self.entries:
+            self.size -= self.size_of(self.entries.pop(key))
+
+    def size_of(self, value):
+        return 1 if self.sizeof is None else self.sizeof(value)
+
+    def __len__(self):
+        return len(self.entries)
+
+def zeroed_array(fmt, size):
+    "A flat array of 'size' zeros of struct format 'fmt', backed by lazily allocated pages"
+    nbytes = max(size * struct.calcsize(fmt), 1)
+    return memoryview(mmap.mmap(-1, nbytes)).cast(fmt)
+
+class SearchState:
+    """
+      Per-search bookkeeping for every cell of a world, indexed by cell id
+      (y*width + x). Visited and closed flags, best path cost and parent
+      pointers live in flat arrays so checking or updating a cell is O(1).
+
+      The arrays are anonymous memory maps, which the OS zero-fills one page
+      at a time, so a search over a huge world only pays memory for the
+      pages it touches. That is also why parents are stored +1: zero means
+      no parent.
+    """
+    def __init__(self, size):
+        self.visited = zeroed_array('B', size)
+        self.closed = zeroed_array('B', size)
+        self.g = zeroed_array('d', size)
+        self.parent = zeroed_array('q', size)
+
+    def visit(self, cell, parent=-1, g=0.0):
+        "Marks 'cell' as reached from 'parent' with path cost 'g'"
+        self.visited[cell] = 1
+        self.parent[cell] = parent + 1
+        self.g[cell] = g
+
+    def path(self, cell):
+        "Follows the parent pointers back from 'cell' and returns the path from the source"
+        path = []
+        while cell != -1:
+            path.append(cell)
+            cell = self.parent[cell] - 1
+        path.reverse()
+        return path
@@ -0,0 +1,408 @@
+import hashlib
+import math
+import os
+
+import numpy as np
+
+from grid import MAX, DIRECTIONS
+
+OPEN_COST = 1.0
+TURF_COST = 1.5
+
+# rows rasterized at a time, a multiple of 8 so every band packs into whole bytes
+BAND_ROWS = 1024
+# bump when the compiled world format changes so old files get recompiled
+COMPILED_VERSION = 1
+
+class World:
+    """
+      A compiled world. Every cell of the grid is classified once against the
+      enclosure and turf polygons, so the searches only need an array lookup
+      per neighbor instead of rebuilding shapely geometry.
+
+      Cells are numbered y*width + x. The enclosure and turf masks are stored
+      one bit per cell, so a 10,000 x 10,000 world takes 25MB.
+    """
+    def __init__(self, width, height, blocked_bits, turf_bits):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        # bit-packed uint8 arrays in cell id order, bit (cell & 7) of byte (cell >> 3)
+        self.blocked_bits = blocked_bits
+        self.turf_bits = turf_bits
+        # indexing a memoryview is much cheaper than indexing numpy scalars
+        self.blocked_view = memoryview(blocked_bits)
+        self.turf_view = memoryview(turf_bits)
+        # (enclosure polygons, turf polygons) as lists of (x, y) tuples, when known
+        self.polygons = None
+        # (enclosure path, turf path) when the world was loaded from files
+        self.files = None
+        # file_digest of those files as they were when the world was built from them, preprocessing built from this
+        # world is cached under it, so an edit to the files afterwards can't file stale tables under the new contents
+        self.digest = None
+        self._fingerprint = None
+        # PolygonIndex of the enclosures and of the turfs, built on the first off-grid query
+        self._indexes = None
+
+    def fingerprint(self):
+        "A hash of the size and masks, the same across runs, for keying caches"
+        if self._fingerprint is None:
+            digest = hashlib.sha1(f"{self.width}x{self.height}".encode())
+            digest.update(self.blocked_view)
+            digest.update(self.turf_view)
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def cell_id(self, x, y):
+        return y * self.width + x
+
+    def cell_xy(self, cell):
+        return cell % self.width, cell // self.width
+
+    def neighbors(self, cell):
+        "Returns the free cells next to 'cell' in DIRECTIONS order"
+        width = self.width
+        blocked = self.blocked_view
+        x, y = cell % width, cell // width
+        children = []
+        for dx, dy in DIRECTIONS:
+            child_x = x + dx
+            child_y = y + dy
+            if 0 <= child_x < width and 0 <= child_y < self.height:
+                child = child_y * width + child_x
+                if not (blocked[child >> 3] >> (child & 7)) & 1:
+                    children.append(child)
+        return children
+
+    def step_cost(self, cell):
+        "Cost of moving onto 'cell'"
+        if (self.turf_view[cell >> 3] >> (cell & 7)) & 1:
+            return TURF_COST
+        return OPEN_COST
+
+    def is_blocked(self, x, y):
+        "Returns true if (x, y) is inside an enclosure or outside the canvas"
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return True
+        cell = y * self.width + x
+        return bool((self.blocked_view[cell >> 3] >> (cell & 7)) & 1)
+
+    def is_turf(self, x, y):
+        "Returns true if stepping onto (x, y) costs more than open ground"
+        return self.step_cost(y * self.width + x) != OPEN_COST
+
+    def polygon_indexes(self):
+        "(enclosure index, turf index) for exact checks at any coordinates, see PolygonIndex"
+        if self._indexes is None:
+            if self.polygons is None:
+                raise ValueError("this world was built from arrays and has no polygons to check against")
+            self._indexes = (PolygonIndex(self.polygons[0]), PolygonIndex(self.polygons[1]))
+        return self._indexes
+
+    def enclosed_at(self, xs, ys):
+        """
+          Exact is_enclosed for arrays of (possibly fractional) coordinates:
+          true inside or touching an enclosure, or outside the canvas
+        """
+        xs, ys = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)
+        outside = (xs < 0) | (xs >= self.width) | (ys < 0) | (ys >= self.height)
+        return outside | self.polygon_indexes()[0].contains_many(xs, ys).reshape(xs.shape)
+
+    def turf_at(self, xs, ys):
+        "Exact is_enclosed against the turfs for arrays of coordinates, without the canvas check"
+        return self.polygon_indexes()[1].contains_many(xs, ys).reshape(np.shape(xs))
+
+    def blocked_mask(self):
+        "Unpacks the enclosure mask into a (height, width) bool array"
+        return unpack_bits(self.blocked_bits, self.width, self.height)
+
+    def cost_grid(self):
+        "Unpacks the turf mask into a (height, width) array of step costs"
+        return np.where(unpack_bits(self.turf_bits, self.width, self.height), TURF_COST, OPEN_COST)
+
+# a hash of the contents of the given files, for keying caches built from them
+def file_digest(paths):
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+# where preprocessing built from a pair of world files is cached, next to the files
+def cache_dir(files):
+    return os.path.join(os.path.dirname(os.path.abspath(files[0])), ".cache")
+
+# straight line distance between two cell ids
+def cell_distance(world, c1, c2):
+    x1, y1 = world.cell_xy(c1)
+    x2, y2 = world.cell_xy(c2)
+    return math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+
+# vectorized lookup of the bits for an array of cell ids
+def cell_bits(bits, cells):
+    return (bits[cells >> 3] >> (cells & 7).astype(np.uint8)) & 1
+
+def pack_bits(mask):
+    return np.packbits(np.asarray(mask, dtype=bool).reshape(-1), bitorder='little')
+
+def unpack_bits(bits, width, height):
+    return np.unpackbits(bits, count=width * height, bitorder='little').reshape(height, width).astype(bool)
+
+# builds a world straight from (height, width) arrays, any cost other than open ground counts as turf
+def world_from_arrays(blocked, cost):
+    height, width = np.shape(blocked)
+    return World(width, height, pack_bits(blocked), pack_bits(np.asarray(cost) != OPEN_COST))
+
+# shapely geometry for one polygon, built once and reused for every band or window it is checked against
+def prepare_shape(polygon):
+    # shapely is only needed to compile or edit a world, not to load or search one
+    import shapely
+    from shapely import geometry
+    enclosure = geometry.Polygon(polygon)
+    buffered_enclosure = enclosure.buffer(0.25)
+    shapely.prepare(buffered_enclosure)
+    return enclosure, buffered_enclosure, buffered_enclosure.bounds
+
+# the cells of the window x0..x1, y0..y1 (inclusive) that is_enclosed would report for one prepared shape
+# returns (x0, y0, mask) with the window clipped to the shape's reach, or None when they don't overlap
+# the 0.25 buffer can only reach one cell past the polygon's bounding box, so only those cells are checked
+def shape_cells(shape, x0, y0, x1, y1):
+    import shapely
+    enclosure, buffered_enclosure, (minx, miny, maxx, maxy) = shape
+    x0, x1 = max(int(np.floor(minx)), x0), min(int(np.ceil(maxx)), x1)
+    y0, y1 = max(int(np.floor(miny)), y0), min(int(np.ceil(maxy)), y1)
+    if x0 > x1 or y0 > y1:
+        return None
+    xs, ys = np.meshgrid(np.arange(x0, x1 + 1), np.arange(y0, y1 + 1))
+    inside = shapely.contains_xy(buffered_enclosure, xs, ys)
+    # a point can only touch the polygon on its boundary, so only those get the exact check
+    outside = ~inside
+    near = shapely.intersects_xy(enclosure.boundary, xs[outside], ys[outside])
+    if near.any():
+        candidates = shapely.points(xs[outside][near], ys[outside][near])
+        touching = np.zeros(outside.sum(), dtype=bool)
+        touching[near] = shapely.touches(enclosure, candidates)
+        inside[outside] = touching
+    return x0, y0, inside
+
+class PolygonIndex:
+    """
+      Exact is_enclosed checks at any coordinates against a fixed list of
+      polygons. Each polygon is buffered and prepared once, and an STRtree of
+      the buffered shapes narrows every query down to the few polygons whose
+      bounds it falls in, instead of testing (and re-buffering) all of them.
+    """
+    def __init__(self, polygon_list):
+        import shapely
+        shapes = [prepare_shape(polygon) for polygon in polygon_list]
+        self.enclosures = np.empty(len(shapes), dtype=object)
+        self.enclosures[:] = [enclosure for enclosure, _, _ in shapes]
+        self.buffered = np.empty(len(shapes), dtype=object)
+        self.buffered[:] = [buffered_enclosure for _, buffered_enclosure, _ in shapes]
+        self.tree = shapely.STRtree(self.buffered)
+
+    def contains(self, x, y):
+        "True if (x, y) is inside a buffered polygon or touches a polygon"
+        return bool(self.contains_many([x], [y])[0])
+
+    def contains_many(self, xs, ys):
+        "contains for arrays of coordinates in one vectorized query, returns a bool array"
+        import shapely
+        xs, ys = np.asarray(xs, dtype=float).ravel(), np.asarray(ys, dtype=float).ravel()
+        inside = np.zeros(len(xs), dtype=bool)
+        if len(xs) == 0 or len(self.buffered) == 0:
+            return inside
+        points = shapely.points(xs, ys)
+        # candidate (point, polygon) pairs by bounding box, then the exact check on the prepared shapes
+        point_ids, shape_ids = self.tree.query(points)
+        hit = shapely.contains_xy(self.buffered[shape_ids], xs[point_ids], ys[point_ids])
+        inside[point_ids[hit]] = True
+        rest = ~inside[point_ids]
+        if rest.any():
+            point_ids, shape_ids = point_ids[rest], shape_ids[rest]
+            touching = shapely.touches(self.enclosures[shape_ids], points[point_ids])
+            inside[point_ids[touching]] = True
+        return inside
+
+# marks every cell that is_enclosed would report for this polygon list, bit-packed in cell id order
+# rows are done in bands so a large world never needs a full bool mask in memory
+def rasterize(polygon_list, width, height):
+    shapes = [prepare_shape(polygon) for polygon in polygon_list]
+    bits = np.zeros((width * height + 7) // 8, dtype=np.uint8)
+    for band_y0 in range(0, height, BAND_ROWS):
+        band_y1 = min(band_y0 + BAND_ROWS, height) - 1
+        band = np.zeros((band_y1 - band_y0 + 1, width), dtype=bool)
+        for shape in shapes:
+            cells = shape_cells(shape, 0, band_y0, width - 1, band_y1)
+            if cells is not None:
+                x0, y0, inside = cells
+                band[y0 - band_y0:y0 - band_y0 + inside.shape[0], x0:x0 + inside.shape[1]] |= inside
+        start = band_y0 * width // 8
+        packed = pack_bits(band)
+        bits[start:start + len(packed)] = packed
+    return bits
+
+# the (height, width) window x0..x1, y0..y1 of rasterize(polygon_list, ...), without touching the rest of the world
+def rasterize_window(polygon_list, x0, y0, x1, y1):
+    window = np.zeros((y1 - y0 + 1, x1 - x0 + 1), dtype=bool)
+    for polygon in polygon_list:
+        cells = shape_cells(prepare_shape(polygon), x0, y0, x1, y1)
+        if cells is not None:
+            cx, cy, inside = cells
+            window[cy - y0:cy - y0 + inside.shape[0], cx - x0:cx - x0 + inside.shape[1]] |= inside
+    return window
+
+# polygons are lists of (x, y) tuples, the same shape the searches used to take
+def compile_world(enc_polygons, turf_polygons, width=MAX, height=MAX):
+    world = World(width, height, rasterize(enc_polygons, width, height), rasterize(turf_polygons, width, height))
+    world.polygons = (enc_polygons, turf_polygons)
+    return world
+
+# the cell ids of the window x0..x1, y0..y1 (inclusive) as a (height, width) array
+def window_cells(world, x0, y0, x1, y1):
+    xs, ys = np.meshgrid(np.arange(x0, x1 + 1), np.arange(y0, y1 + 1))
+    return ys * world.width + xs
+
+# sets the bit of each cell to the matching bool of 'values', ufunc.at because neighboring cells share bytes
+def set_cell_bits(bits, cells, values):
+    on, off = cells[values], cells[~values]
+    np.bitwise_or.at(bits, on >> 3, (1 << (on & 7)).astype(np.uint8))
+    np.bitwise_and.at(bits, off >> 3, ~(1 << (off & 7)).astype(np.uint8))
+
+# the window a polygon can mark cells in, its bounding box plus one cell, clipped to the world
+def polygon_window(world, polygon):
+    xs = [x for x, y in polygon]
+    ys = [y for x, y in polygon]
+    return (max(math.floor(min(xs)) - 1, 0), max(math.floor(min(ys)) - 1, 0),
+            min(math.ceil(max(xs)) + 1, world.width - 1), min(math.ceil(max(ys)) + 1, world.height - 1))
+
+def windows_overlap(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+# re-rasterizes one mask inside the windows of the changed polygons, returns the cells whose bit flipped
+def update_mask(world, bits, polygon_list, changed):
+    flipped = []
+    windows = [polygon_window(world, polygon) for polygon in polygon_list]
+    for polygon in changed:
+        window = polygon_window(world, polygon)
+        if window[0] > window[2] or window[1] > window[3]:
+            continue
+        # only polygons that reach into the window can mark cells in it
+        nearby = [p for p, w in zip(polygon_list, windows) if windows_overlap(w, window)]
+        cells = window_cells(world, *window)
+        new = rasterize_window(nearby, *window)
+        old = cell_bits(bits, cells).astype(bool)
+        if (new != old).any():
+            set_cell_bits(bits, cells, new)
+            flipped.append(cells[new != old])
+    return np.concatenate(flipped) if flipped else np.zeros(0, dtype=np.int64)
+
+# adds and removes polygons (lists of (x, y) tuples) of a compiled world in place
+# only the cells near the changed polygons are re-rasterized, returns the ids of the cells that changed
+# the world gets a new fingerprint, so caches keyed by the old one are never used for it
+def edit_world(world, add_enclosures=(), remove_enclosures=(), add_turfs=(), remove_turfs=()):
+    if world.polygons is None:
+        raise ValueError("only a world compiled from polygons can be edited")
+    enc_polygons, turf_polygons = [[list(map(tuple, polygon)) for polygon in polygons] for polygons in world.polygons]
+    add_enclosures, remove_enclosures, add_turfs, remove_turfs = [
+        [list(map(tuple, polygon)) for polygon in polygons]
+        for polygons in (add_enclosures, remove_enclosures, add_turfs, remove_turfs)]
+    for polygons, removed in ((enc_polygons, remove_enclosures), (turf_polygons, remove_turfs)):
+        for polygon in removed:
+            if polygon not in polygons:
+                raise ValueError(f"{polygon} is not a polygon of this world")
+            polygons.remove(polygon)
+    enc_polygons += add_enclosures
+    turf_polygons += add_turfs
+
+    changed = np.concatenate([
+        update_mask(world, world.blocked_bits, enc_polygons, add_enclosures + remove_enclosures),
+        update_mask(world, world.turf_bits, turf_polygons, add_turfs + remove_turfs)])
+    world.polygons = (enc_polygons, turf_polygons)
+    world._fingerprint = None
+    world._indexes = None
+    # the files no longer describe the world, so nothing may be cached under their digest
+    world.files = None
+    world.digest = None
+    return np.unique(changed)
+
+# polygons as one (n, 2) array of vertices plus the vertex count of each polygon
+def polygons_to_arrays(polygons):
+    counts = np.array([len(polygon) for polygon in polygons], dtype=np.int64)
+    points = np.array([point for polygon in polygons for point in polygon], dtype=np.int64).reshape(-1, 2)
+    return points, counts
+
+def arrays_to_polygons(points, counts):
+    polygons = []
+    start = 0
+    for count in counts.tolist():
+        polygons.append([tuple(point) for point in points[start:start + count].tolist()])
+        start += count
+    return polygons
+
+# writes the arrays to a temporary file first and moves it into place, so processes saving the same cache file at
+# once never leave a half written one behind
+# like np.savez, '.npz' is added to a path without it
+def save_npz(path, **arrays):
+    if not path.endswith(".npz"):
+        path += ".npz"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temporary, path)
+    except BaseException:
+        # a failed write (a full disk, say) leaves no partial file behind
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+# preprocessing built once per world, such as the HPA* abstraction or the landmark tables: from 'memory' (an
+# LRUCache), then from the .npz saved in cache_dir next to the world files, then from build()
+# tables are kept by (world fingerprint, key) in memory and saved as '{kind}-{digest}-{key}.npz', which only happens
+# when the world knows the digest of its files
+# load(world, saved) turns an open .npz back into a table, or returns None if it doesn't fit the world
+# table.arrays() gives the arrays to save, a file saved with another 'version' is ignored and rebuilt
+def cached_table(world, memory, kind, key, version, build, load):
+    table = memory.get((world.fingerprint(), key))
+    if table is not None:
+        return table
+
+    path = None
+    if world.digest is not None:
+        path = os.path.join(cache_dir(world.files), f"{kind}-{world.digest}-{key}.npz")
+        if os.path.exists(path):
+            with np.load(path) as saved:
+                if int(saved["version"]) == version:
+                    table = load(world, saved)
+    if table is None:
+        table = build()
+        if path is not None:
+            try:
+                save_npz(path, version=version, **table.arrays())
+            except OSError:
+                # without a writable cache directory the table is still used, just rebuilt by the next process
+                pass
+    memory.put((world.fingerprint(), key), table)
+    return table
+
+# compiled worlds are uncompressed .npz files, loading one is a handful of array reads with no parsing or rasterizing
+def save_world(world, path):
+    enc_polygons, turf_polygons = world.polygons or ([], [])
+    enc_points, enc_counts = polygons_to_arrays(enc_polygons)
+    turf_points, turf_counts = polygons_to_arrays(turf_polygons)
+    save_npz(path, version=COMPILED_VERSION, width=world.width, height=world.height,
+             blocked_bits=world.blocked_bits, turf_bits=world.turf_bits,
+             enc_points=enc_points, enc_counts=enc_counts, turf_points=turf_points, turf_counts=turf_counts)
+
+# returns None for a file written by an older format
+def load_compiled_world(path):
+    with np.load(path) as saved:
+        if int(saved["version"]) != COMPILED_VERSION:
+            return None
+        world = World(int(saved["width"]), int(saved["height"]), saved["blocked_bits"], saved["turf_bits"])
+        world.polygons = (arrays_to_polygons(saved["enc_points"], saved["enc_counts"]),
+                          arrays_to_polygons(saved["turf_points"], saved["turf_counts"]))
+    return world